@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
 import datetime
 import argparse
@@ -8,10 +9,11 @@ import nst
 import cirb
 import circ
 import cirm
-from nst_duration_data_object import NSTDurationDataObject
-from cirb_duration_data_object import CIRBDurationDataObject
-from circ_duration_data_object import CIRCDurationDataObject
-from cirm_duration_data_object import CIRMDurationDataObject
+import top_k
+import hits_at_k
+import preprocessing
+from dec_data_object import DECDataObject
+from profiler import NULL_PROFILER, Profiler
 
 VERSION = 3
 
@@ -21,6 +23,22 @@ def parse_args():
     parser.add_argument(
         "-sz", "--size", help="Data size", required=False, default=-1, type=int
     )
+    parser.add_argument(
+        "--from",
+        help="Only use the time slice starting at this timestep",
+        required=False,
+        default=None,
+        type=int,
+        dest="time_from",
+    )
+    parser.add_argument(
+        "--to",
+        help="Only use the time slice ending at this timestep",
+        required=False,
+        default=None,
+        type=int,
+        dest="time_to",
+    )
     parser.add_argument(
         "--nst",
         help="Run NST",
@@ -52,7 +70,7 @@ def parse_args():
     parser.add_argument(
         "-I",
         "--infile",
-        help="Path to the data file",
+        help="Path to the data file, or to a dataset converted by convert.py",
         required=True,
         nargs=1,
         dest="in_file",
@@ -84,6 +102,126 @@ def parse_args():
         dest="duration_col_name",
     )
     parser.add_argument("--parent", help="Path to the parent file", dest="parent_file")
+    parser.add_argument(
+        "--backend",
+        help="Backend computing the window statistics (default: numpy for integral "
+        "durations, else python)",
+        required=False,
+        default="auto",
+        choices=["auto", "python", "numpy"],
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory caching the window statistics between runs",
+        required=False,
+        default=None,
+        dest="cache_dir",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of workers (default: the CPUs in the affinity mask of the process)",
+        required=False,
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--execution",
+        help="How the statistics are computed: serially, on threads or on processes "
+        "(default: serially for small inputs, else on processes)",
+        required=False,
+        default="auto",
+        choices=["auto", "serial", "thread", "process"],
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Stream the data file in chunks of this many rows instead of reading it whole",
+        required=False,
+        default=None,
+        type=int,
+        dest="chunk_size",
+    )
+    parser.add_argument(
+        "--raw",
+        help="The data file is a raw dataset (one row per timestep); collapse it into "
+        "duration rows on the fly",
+        required=False,
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--max-z-order",
+        help="CIRM: only enumerate z combinations of at most this many parents",
+        required=False,
+        default=None,
+        type=int,
+        dest="max_z_order",
+    )
+    parser.add_argument(
+        "--z-samples",
+        help="CIRM: estimate over this many randomly sampled z combinations per effect",
+        required=False,
+        default=None,
+        type=int,
+        dest="z_samples",
+    )
+    parser.add_argument(
+        "--top-k",
+        help="Only write the K causes with the best scores for every effect and window size, "
+        "skipping the pairs that cannot enter them",
+        required=False,
+        default=None,
+        type=int,
+        dest="top_k",
+    )
+    parser.add_argument(
+        "--lambda",
+        help="NST: the lambda_const values; with several lambda or alpha values, NST is "
+        "written for every (lambda, alpha) to a separate sweep file",
+        required=False,
+        default=[0.5],
+        nargs="+",
+        type=float,
+        dest="lambda_consts",
+    )
+    parser.add_argument(
+        "--alpha",
+        help="NST: the alpha_const values",
+        required=False,
+        default=[0.5],
+        nargs="+",
+        type=float,
+        dest="alpha_consts",
+    )
+    parser.add_argument(
+        "--ground-truth",
+        help="Path to a ground-truth file; also write Hits@K of the results",
+        required=False,
+        default=None,
+        dest="ground_truth_file",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Write the wall and CPU time, tasks, bytes pickled to the workers and peak RSS "
+        "of every phase of the run to this JSON file",
+        required=False,
+        default=None,
+        dest="profile_file",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Also run every phase under cProfile and dump its stats to this directory",
+        required=False,
+        default=None,
+        dest="profile_dir",
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed of the z combination sampling",
+        required=False,
+        default=0,
+        type=int,
+    )
     return parser.parse_args()
 
 
@@ -100,128 +238,212 @@ if __name__ == "__main__":
         print("[-] Please specify at least one score.")
         sys.exit(0)
 
-    if args.nst:
-        print("[+] Creating an NST duration data object.", datetime.datetime.now())
-        nst_data_obj = NSTDurationDataObject(
-            in_file,
-            cause_col_name,
-            effect_col_name,
-            duration_col_name,
-            window_sizes,
-            args.size,
+    scores = [
+        score
+        for score, selected in [
+            ("nst", args.nst),
+            ("cirb", args.cirb),
+            ("circ", args.circ),
+            ("cirm", args.cirm),
+        ]
+        if selected
+    ]
+    if args.cirm and not args.parent_file:
+        print("[-] Please specify the parent file, use -h for help.")
+        sys.exit(0)
+    time_slice = args.time_from is not None or args.time_to is not None
+    if time_slice and args.size > 0:
+        print("[-] Please specify either --size or --from/--to.")
+        sys.exit(0)
+    if args.top_k is not None and (args.top_k < 1 or args.cirm):
+        print("[-] --top-k takes a positive K and supports --nst, --cirb and --circ.")
+        sys.exit(0)
+    if (
+        args.top_k is not None
+        and args.nst
+        and not all(0 <= lambda_const <= 1 for lambda_const in args.lambda_consts)
+    ):
+        print("[-] --top-k with --nst requires a lambda between 0 and 1.")
+        sys.exit(0)
+    if args.top_k is not None and args.ground_truth_file:
+        print("[-] --ground-truth cannot be combined with --top-k.")
+        sys.exit(0)
+    sweep = len(args.lambda_consts) > 1 or len(args.alpha_consts) > 1
+    if sweep and (not args.nst or args.top_k is not None):
+        print(
+            "[-] A sweep over several lambda or alpha values requires --nst and no --top-k."
         )
-        print("[+] Created NST data object.", datetime.datetime.now())
-        cause_set = nst_data_obj.cause_set
-        effect_set = nst_data_obj.effect_set
+        sys.exit(0)
+    if args.raw and args.cache_dir:
+        print("[-] The statistics of a raw dataset cannot be cached.")
+        sys.exit(0)
 
-    if args.cirb:
-        print("[+] Creating a CIRB duration data object.", datetime.datetime.now())
-        cirb_data_obj = CIRBDurationDataObject(
+    data = in_file
+    if args.raw:
+        data = preprocessing.duration_chunks(
             in_file,
             cause_col_name,
             effect_col_name,
             duration_col_name,
-            window_sizes,
-            args.size,
+            args.chunk_size or 100000,
         )
-        print("[+] Created CIRB data object.", datetime.datetime.now())
-        cause_set = cirb_data_obj.cause_set
-        effect_set = cirb_data_obj.effect_set
 
-    if args.circ:
-        print("[+] Creating a CIRC duration data object.", datetime.datetime.now())
-        circ_data_obj = CIRCDurationDataObject(
-            in_file,
-            cause_col_name,
-            effect_col_name,
-            duration_col_name,
-            window_sizes,
-            args.size,
-        )
-        print("[+] Created CIRC data object.", datetime.datetime.now())
-        cause_set = circ_data_obj.cause_set
-        effect_set = circ_data_obj.effect_set
+    profiler = NULL_PROFILER
+    if args.profile_file or args.profile_dir:
+        profiler = Profiler(args.profile_dir)
 
-    if args.cirm:
-        print("[+] Creating CIRM data object.", datetime.datetime.now())
-        if not args.parent_file:
-            print("[-] Please specify the parent file, use -h for help.")
-            sys.exit(0)
+    print("[+] Creating a DEC data object.", datetime.datetime.now())
+    data_class = DECDataObject if args.top_k is None else top_k.TopKDataObject
+    data_obj = data_class(
+        data,
+        cause_col_name,
+        effect_col_name,
+        duration_col_name,
+        window_sizes,
+        scores,
+        args.parent_file,
+        args.size,
+        args.backend,
+        args.cache_dir,
+        args.jobs,
+        args.execution,
+        args.chunk_size,
+        args.max_z_order,
+        args.z_samples,
+        args.seed,
+        args.time_from,
+        args.time_to,
+        profiler=profiler,
+    )
+    print("[+] Created DEC data object.", datetime.datetime.now())
+    causes, effects = data_obj.pair_axes()
 
-        cirm_data_obj = CIRMDurationDataObject(
-            in_file,
-            cause_col_name,
-            effect_col_name,
-            duration_col_name,
-            window_sizes,
-            args.parent_file,
-            args.size,
-        )
-        print("[+] Created CIRM data object.", datetime.datetime.now())
-        cause_set = cirm_data_obj.cause_set
-        effect_set = cirm_data_obj.effect_set
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    size = args.size if args.size > 0 else "full"
+    if time_slice:
+        size = f"{args.time_from if args.time_from is not None else 'start'}-{args.time_to if args.time_to is not None else 'end'}"
 
+    if args.top_k is not None:
+        for score in scores:
+            with profiler.phase(f"top_k_{score}"):
+                df = top_k.top_k(
+                    data_obj,
+                    score,
+                    args.top_k,
+                    window_sizes,
+                    lambda_const=args.lambda_consts[0],
+                    alpha_const=args.alpha_consts[0],
+                )
+            print(
+                f"[+] {score}: evaluated {df.attrs['evaluated pairs']} of "
+                f"{len(causes) * len(effects)} pairs.",
+                datetime.datetime.now(),
+            )
+            df.to_csv(
+                os.path.join(
+                    out_dir,
+                    f"v-{VERSION}-sz-{size}-top-{args.top_k}-{score}-.csv",
+                ),
+                index=False,
+            )
+        if args.profile_file:
+            profiler.write(args.profile_file, command=sys.argv)
+        print("[+] Finished.", datetime.datetime.now())
+        sys.exit(0)
+
+    # One row per (window size, cause, effect), in the order of the score arrays.
+    n_pairs = len(causes) * len(effects)
     results = {
-        "window size": [],
-        "cause": [],
-        "effect": [],
+        "window size": np.repeat(window_sizes, n_pairs),
+        "cause": np.tile(
+            np.repeat(np.array(causes, dtype=object), len(effects)), len(window_sizes)
+        ),
+        "effect": np.tile(
+            np.array(effects, dtype=object), len(window_sizes) * len(causes)
+        ),
     }
 
-    if args.nst:
-        results["nst"] = []
+    ground_truth = None
+    if args.ground_truth_file:
+        ground_truth = hits_at_k.load_ground_truth(args.ground_truth_file)
+
+    if args.nst and sweep:
+        # Every (lambda, alpha) point from the statistics read once, in long format.
+        with profiler.phase("score_nst_sweep"):
+            sweep_scores = nst.nst_sweep(
+                data_obj, window_sizes, args.lambda_consts, args.alpha_consts
+            )
+        axes = [args.lambda_consts, args.alpha_consts, window_sizes]
+        names = ["lambda", "alpha", "window size"]
+        df = pd.MultiIndex.from_product(
+            axes + [causes, effects], names=names + ["cause", "effect"]
+        ).to_frame(index=False)
+        df["nst"] = sweep_scores.ravel()
+        df.to_csv(
+            os.path.join(out_dir, f"v-{VERSION}-sz-{size}-nst-sweep-.csv"),
+            index=False,
+        )
+        if ground_truth is not None:
+            ks = np.arange(1, len(causes) + 1)
+            df = pd.MultiIndex.from_product(axes + [ks], names=names + ["K"]).to_frame(
+                index=False
+            )
+            df["hits@K"] = hits_at_k.hits_at_k(
+                sweep_scores, causes, effects, ground_truth, ks
+            ).ravel()
+            df.to_csv(
+                os.path.join(out_dir, f"v-{VERSION}-sz-{size}-nst-sweep-hits-.csv"),
+                index=False,
+            )
+    elif args.nst:
+        with profiler.phase("score_nst"):
+            results["nst"] = nst.nst_matrix(
+                data_obj, window_sizes, args.lambda_consts[0], args.alpha_consts[0]
+            ).ravel()
+
     if args.cirb:
-        results["cirb"] = []
+        with profiler.phase("score_cirb"):
+            results["cirb"] = cirb.cirb_matrix(data_obj, window_sizes).ravel()
+
     if args.circ:
-        results["circ"] = []
-    if args.cirm:
-        results["cirm 1 (avg)"] = []
-        results["cirm 1 (max)"] = []
-        results["cirm 2 (avg)"] = []
-        results["cirm 2 (max)"] = []
-
-    for window_size in window_sizes:
-        for cause in cause_set:
-            for effect in effect_set:
-                results["window size"].append(window_size)
-                results["cause"].append(cause)
-                results["effect"].append(effect)
-
-                if args.nst:
-                    nst_score = nst.nst(
-                        nst_data_obj, cause, effect, window_size, 0.5, 0.5
-                    )
-                    results["nst"].append(nst_score)
-
-                if args.cirb:
-                    cirb_score = cirb.cirb(cirb_data_obj, cause, effect, window_size)
-                    results["cirb"].append(cirb_score)
-
-                if args.circ:
-                    circ_score = circ.circ(circ_data_obj, cause, effect, window_size)
-                    results["circ"].append(circ_score)
-
-                if args.cirm:
-                    cirm_score = cirm.cirm_single_z(
-                        cirm_data_obj, cause, effect, window_size
-                    )
-                    results["cirm 1 (avg)"].append(cirm_score["avg"])
-                    results["cirm 1 (max)"].append(cirm_score["max"])
-                    cirm_score = cirm.cirm_enumerated_z(
-                        cirm_data_obj, cause, effect, window_size
-                    )
-                    results["cirm 2 (avg)"].append(cirm_score["avg"])
-                    results["cirm 2 (max)"].append(cirm_score["max"])
+        with profiler.phase("score_circ"):
+            results["circ"] = circ.circ_matrix(data_obj, window_sizes).ravel()
 
-    if not os.path.isdir(out_dir):
-        os.makedirs(out_dir)
+    if args.cirm:
+        with profiler.phase("score_cirm_single_z"):
+            cirm_scores = cirm.cirm_single_z_matrix(data_obj, window_sizes)
+        results["cirm 1 (avg)"] = cirm_scores["avg"].ravel()
+        results["cirm 1 (max)"] = cirm_scores["max"].ravel()
+        with profiler.phase("score_cirm_enumerated_z"):
+            cirm_scores = cirm.cirm_enumerated_z_matrix(data_obj, window_sizes)
+        results["cirm 2 (avg)"] = cirm_scores["avg"].ravel()
+        results["cirm 2 (max)"] = cirm_scores["max"].ravel()
+        if args.max_z_order or args.z_samples:
+            results["cirm 2 (combinations)"] = np.tile(
+                cirm_scores["combinations"], len(window_sizes) * len(causes)
+            )
 
-    printed_score = f'{"nst-" if args.nst else ""}{"cirb-" if args.cirb else ""}{"circ-" if args.circ else ""}{"cirm-" if args.cirm else ""}'
-    df = pd.DataFrame(results)
-    df.to_csv(
-        os.path.join(
-            out_dir,
-            f"v-{VERSION}-sz-{args.size if args.size > 0 else 'full'}-{printed_score}.csv",
-        ),
-        index=False,
-    )
+    printed_score = f'{"nst-" if args.nst and not sweep else ""}{"cirb-" if args.cirb else ""}{"circ-" if args.circ else ""}{"cirm-" if args.cirm else ""}'
+    if printed_score:
+        df = pd.DataFrame(results)
+        with profiler.phase("write_results"):
+            df.to_csv(
+                os.path.join(
+                    out_dir,
+                    f"v-{VERSION}-sz-{size}-{printed_score}.csv",
+                ),
+                index=False,
+            )
+        if ground_truth is not None:
+            hits_at_k.evaluate(df, ground_truth).to_csv(
+                os.path.join(
+                    out_dir,
+                    f"v-{VERSION}-sz-{size}-{printed_score}hits-.csv",
+                ),
+                index=False,
+            )
+    if args.profile_file:
+        profiler.write(args.profile_file, command=sys.argv)
     print("[+] Finished.", datetime.datetime.now())
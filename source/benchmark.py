@@ -0,0 +1,445 @@
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import datetime
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import nst
+import cirb
+import circ
+import cirm
+from executor import available_cpus
+from nst_duration_data_object import NSTDurationDataObject
+from cirb_duration_data_object import CIRBDurationDataObject
+from circ_duration_data_object import CIRCDurationDataObject
+from cirm_duration_data_object import CIRMDurationDataObject
+
+FORMAT_VERSION = 1
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The bundled datasets: data file, cause, effect and duration columns, parent file.
+DATASETS = {
+    "air": (
+        os.path.join("data", "air", "preprocessedData", "Air_PM10_Duration.csv"),
+        "cause",
+        "effect",
+        "duration",
+        os.path.join("parent", "air", "parent_PM10.json"),
+    ),
+    "diabetes": (
+        os.path.join("data", "diabetes", "preprocessedData", "Diabetes_Duration.csv"),
+        "code",
+        "value",
+        "duration",
+        os.path.join("parent", "diabetes", "parent.json"),
+    ),
+    "synthetic": (
+        os.path.join("data", "synthetic", "preprocessedData", "gen_0_duration.csv"),
+        "cause",
+        "effect",
+        "duration",
+        os.path.join("parent", "synthetic", "gen_0.json"),
+    ),
+}
+
+
+def _score_cirm(data_obj, window_sizes):
+    return (
+        cirm.cirm_single_z_matrix(data_obj, window_sizes),
+        cirm.cirm_enumerated_z_matrix(data_obj, window_sizes),
+    )
+
+
+# The data object class and the scoring of every score.
+SCORES = {
+    "nst": (
+        NSTDurationDataObject,
+        lambda data_obj, window_sizes: nst.nst_matrix(data_obj, window_sizes, 0.5, 0.5),
+    ),
+    "cirb": (CIRBDurationDataObject, cirb.cirb_matrix),
+    "circ": (CIRCDurationDataObject, circ.circ_matrix),
+    "cirm": (CIRMDurationDataObject, _score_cirm),
+}
+
+# The fields identifying a case across runs.
+CASE_FIELDS = (
+    "dataset",
+    "score",
+    "size",
+    "window_sizes",
+    "parents",
+    "backend",
+    "execution",
+    "jobs",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time the data object construction and the scoring on the bundled datasets"
+    )
+    parser.add_argument(
+        "-O",
+        "--outfile",
+        help="Path to the JSON file to store the results",
+        required=False,
+        default=None,
+        dest="out_file",
+    )
+    parser.add_argument(
+        "--datasets",
+        help="The datasets to run on",
+        required=False,
+        default=list(DATASETS),
+        nargs="+",
+        choices=list(DATASETS),
+    )
+    parser.add_argument(
+        "--scores",
+        help="The scores to run",
+        required=False,
+        default=list(SCORES),
+        nargs="+",
+        choices=list(SCORES),
+    )
+    parser.add_argument(
+        "-sz",
+        "--size",
+        help="The data sizes to run (-1: the whole dataset)",
+        required=False,
+        default=[-1],
+        nargs="+",
+        type=int,
+        dest="sizes",
+    )
+    parser.add_argument(
+        "--windows",
+        help="The numbers of window sizes to run, each with the window sizes 1 to N",
+        required=False,
+        default=[30],
+        nargs="+",
+        type=int,
+    )
+    parser.add_argument(
+        "--parents",
+        help="CIRM: the parent set sizes to run, keeping the effect and the first K other "
+        "parents of every effect (0: all of them)",
+        required=False,
+        default=[0],
+        nargs="+",
+        type=int,
+    )
+    parser.add_argument(
+        "--backend",
+        help="Backend computing the window statistics (default: numpy for integral "
+        "durations, else python)",
+        required=False,
+        default="auto",
+        choices=["auto", "python", "numpy"],
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of workers",
+        required=False,
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--execution",
+        help="How the statistics are computed (default: serially, so that the peak "
+        "memory covers all of the work)",
+        required=False,
+        default="serial",
+        choices=["auto", "serial", "thread", "process"],
+    )
+    parser.add_argument(
+        "--repeat",
+        help="Number of timed runs of every case",
+        required=False,
+        default=3,
+        type=int,
+    )
+    parser.add_argument(
+        "--compare",
+        help="Compare two result files (baseline, then new) instead of running",
+        required=False,
+        default=None,
+        nargs=2,
+        metavar=("BASELINE", "NEW"),
+    )
+    parser.add_argument(
+        "--threshold",
+        help="Relative slowdown or memory growth flagged as a regression (default: 0.1)",
+        required=False,
+        default=0.1,
+        type=float,
+    )
+    return parser.parse_args()
+
+
+def cases(datasets, scores, sizes, windows, parents):
+    """Enumerate the cases of a sweep; the parent set sizes only apply to cirm."""
+    for dataset in datasets:
+        for score in scores:
+            for size in sizes:
+                for n_windows in windows:
+                    for n_parents in parents if score == "cirm" else [None]:
+                        yield dataset, score, size, n_windows, n_parents
+
+
+def _parent_file(parent_path, n_parents, tmp_dir):
+    """
+    Return a parent file keeping the first n_parents parents of every effect. The parent
+    files list the effect itself among its parents: it is kept and not counted.
+    """
+    if not n_parents:
+        return parent_path
+    with open(parent_path, "r") as f:
+        parents = json.load(f)
+    truncated = dict()
+    for e, z_list in parents.items():
+        others = [z for z in z_list if z != e][:n_parents]
+        truncated[e] = [z for z in z_list if z == e or z in others]
+    path = os.path.join(tmp_dir, f"parent_{n_parents}.json")
+    with open(path, "w") as f:
+        json.dump(truncated, f)
+    return path
+
+
+def _run_case(data_class, score_fn, args, kwargs, window_sizes, trace):
+    """Construct the data object and score it; return the seconds (or peak bytes) of both."""
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    data_obj = data_class(*args, **kwargs)
+    construction = time.perf_counter() - start
+    if trace:
+        construction = tracemalloc.get_traced_memory()[1]
+        # The scoring peak counts what scoring allocates on top of the data object.
+        tracemalloc.stop()
+        tracemalloc.start()
+    start = time.perf_counter()
+    score_fn(data_obj, window_sizes)
+    scoring = time.perf_counter() - start
+    if trace:
+        scoring = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return data_obj, construction, scoring
+
+
+def run_case(
+    dataset,
+    score,
+    size,
+    n_windows,
+    n_parents,
+    backend="auto",
+    execution="serial",
+    jobs=None,
+    repeat=3,
+    tmp_dir=None,
+):
+    """
+    Time the construction of the data object of a score and the scoring of all its
+    pairs, repeat times each, then measure their peak memory (with tracemalloc, in the
+    process running the scores) in one more run. Return the result record of the case.
+    """
+    data_path, cause, effect, duration, parent_path = DATASETS[dataset]
+    data_class, score_fn = SCORES[score]
+    window_sizes = list(range(1, n_windows + 1))
+    args = [
+        os.path.join(REPO_DIR, data_path),
+        cause,
+        effect,
+        duration,
+        window_sizes,
+    ]
+    if score == "cirm":
+        args.append(
+            _parent_file(os.path.join(REPO_DIR, parent_path), n_parents, tmp_dir)
+        )
+    kwargs = dict(data_size=size, backend=backend, jobs=jobs, execution=execution)
+
+    record = dict(
+        dataset=dataset,
+        score=score,
+        size=size,
+        window_sizes=n_windows,
+        parents=n_parents,
+        backend=backend,
+        execution=execution,
+        jobs=jobs,
+        construction_seconds=[],
+        scoring_seconds=[],
+    )
+    for _ in range(repeat):
+        data_obj, construction, scoring = _run_case(
+            data_class, score_fn, args, kwargs, window_sizes, False
+        )
+        record["construction_seconds"].append(construction)
+        record["scoring_seconds"].append(scoring)
+    data_obj, construction, scoring = _run_case(
+        data_class, score_fn, args, kwargs, window_sizes, True
+    )
+    record["construction_peak_bytes"] = construction
+    record["scoring_peak_bytes"] = scoring
+    record["rows"] = data_obj.T
+    record["causes"] = len(data_obj.cause_set)
+    record["effects"] = len(data_obj.effect_set)
+    return record
+
+
+def environment():
+    """Describe the machine and the library versions of a run."""
+    return dict(
+        created=datetime.datetime.now().isoformat(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        pandas=pd.__version__,
+        platform=platform.platform(),
+        cpus=available_cpus(),
+    )
+
+
+def case_key(record):
+    return tuple(record[field] for field in CASE_FIELDS)
+
+
+def compare(baseline, new, threshold=0.1):
+    """
+    Compare the cases of two result files. Times are compared by their best run, which
+    is the least sensitive to noise, and peak memory as is. Return a table with one row
+    per case and metric present in both files, with the relative change and whether it
+    exceeds threshold.
+    """
+    baseline = {case_key(record): record for record in baseline["results"]}
+    rows = []
+    for record in new["results"]:
+        old = baseline.get(case_key(record))
+        if old is None or "error" in old or "error" in record:
+            continue
+        for metric in (
+            "construction_seconds",
+            "scoring_seconds",
+            "construction_peak_bytes",
+            "scoring_peak_bytes",
+        ):
+            before, after = old[metric], record[metric]
+            if metric.endswith("_seconds"):
+                before, after = min(before), min(after)
+            change = (after - before) / before if before > 0 else 0.0
+            rows.append(
+                dict(
+                    zip(CASE_FIELDS, case_key(record)),
+                    metric=metric,
+                    baseline=before,
+                    new=after,
+                    change=change,
+                    regression=change > threshold,
+                )
+            )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.compare:
+        files = []
+        for path in args.compare:
+            with open(path, "r") as f:
+                files.append(json.load(f))
+        table = compare(*files, args.threshold)
+        if table.empty:
+            print("[-] The two files have no case in common.")
+            sys.exit(0)
+        with pd.option_context("display.width", 200, "display.max_rows", None):
+            print(table.to_string(index=False))
+        regressions = table[table["regression"]]
+        if not regressions.empty:
+            print(
+                f"[-] {len(regressions)} regressions beyond {args.threshold:.0%}.",
+                datetime.datetime.now(),
+            )
+            sys.exit(1)
+        print("[+] No regression.", datetime.datetime.now())
+        sys.exit(0)
+
+    if not args.out_file:
+        print("[-] Please specify the output file, use -h for help.")
+        sys.exit(0)
+    if args.repeat < 1 or min(args.windows) < 1 or min(args.parents) < 0:
+        print("[-] --repeat and --windows take positive numbers, --parents K >= 0.")
+        sys.exit(0)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dataset, score, size, n_windows, n_parents in cases(
+            args.datasets, args.scores, args.sizes, args.windows, args.parents
+        ):
+            print(
+                f"[+] {dataset} {score} size {size} windows {n_windows}"
+                + (f" parents {n_parents}" if n_parents is not None else ""),
+                datetime.datetime.now(),
+            )
+            try:
+                record = run_case(
+                    dataset,
+                    score,
+                    size,
+                    n_windows,
+                    n_parents,
+                    args.backend,
+                    args.execution,
+                    args.jobs,
+                    args.repeat,
+                    tmp_dir,
+                )
+            except (KeyError, ValueError) as error:
+                # e.g. --size on a dataset without an end column.
+                print(f"[-] Skipped: {error!r}")
+                results.append(
+                    dict(
+                        dataset=dataset,
+                        score=score,
+                        size=size,
+                        window_sizes=n_windows,
+                        parents=n_parents,
+                        backend=args.backend,
+                        execution=args.execution,
+                        jobs=args.jobs,
+                        error=repr(error),
+                    )
+                )
+                continue
+            print(
+                f"    construction {min(record['construction_seconds']):.3f} s, "
+                f"scoring {min(record['scoring_seconds']):.3f} s, peak "
+                f"{max(record['construction_peak_bytes'], record['scoring_peak_bytes']) / 2**20:.1f} MiB"
+            )
+            results.append(record)
+
+    out_dir = os.path.dirname(args.out_file)
+    if out_dir and not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    with open(args.out_file, "w") as f:
+        json.dump(
+            dict(
+                format=FORMAT_VERSION,
+                environment=environment(),
+                arguments=vars(args),
+                results=results,
+            ),
+            f,
+            indent=2,
+        )
+    print("[+] Finished.", datetime.datetime.now())
@@ -1,3 +1,5 @@
+import numpy as np
+
 from cirb_duration_data_object import CIRBDurationDataObject
 
 
@@ -18,11 +20,9 @@ def lambda_(
             total_duration(y): All durations of y in the entire dataset.
     """
     sum_duration_y_in_window = data_obj.accumulated_cause_durations[
-        (cause, effect, window_size)
+        (window_size, cause, effect)
     ]
-    total_duration_y = data_obj.duration_col[
-        data_obj.cause_col.apply(data_obj._exist, args=(cause,))
-    ].sum()
+    total_duration_y = data_obj.cause_total_duration[cause]
 
     if total_duration_y == 0:
         return 0
@@ -47,3 +47,39 @@ def cirb(
     if denominator == 0:
         return 0
     return nominator / denominator
+
+
+def lambda_matrix(
+    data_obj: CIRBDurationDataObject, window_sizes: list, causes: list, effects: list
+) -> np.ndarray:
+    """lambda_ for every window size, cause and effect, as a (window size, cause, effect) array."""
+    sum_duration_y_in_window = data_obj.statistic_array(
+        "accumulated_cause_durations", window_sizes, causes, effects
+    )
+    total_duration_y = data_obj.event_array(data_obj.cause_total_duration, causes)[
+        :, None
+    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            total_duration_y != 0, sum_duration_y_in_window / total_duration_y, 0.0
+        )
+
+
+def cirb_matrix(
+    data_obj: CIRBDurationDataObject,
+    window_sizes: list,
+    causes: list = None,
+    effects: list = None,
+) -> np.ndarray:
+    """
+    Compute CIRb(x, y) for every window size, cause and effect at once.
+
+    Returns an array of shape (window size, cause, effect), the causes and effects in
+    the order of data_obj.pair_axes(causes, effects).
+    """
+    causes, effects = data_obj.pair_axes(causes, effects)
+    nominator = lambda_matrix(data_obj, window_sizes, causes, effects)
+    denominator = data_obj.event_array(data_obj.N, effects) / data_obj.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, nominator / denominator, 0.0)
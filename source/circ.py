@@ -1,3 +1,5 @@
+import numpy as np
+
 from circ_duration_data_object import CIRCDurationDataObject
 
 
@@ -19,9 +21,7 @@ def lambda_(
     sum_duration_y_in_window = data_obj.accumulated_cause_durations[
         (window_size, cause, effect)
     ]
-    total_duration = data_obj.duration_col[
-        data_obj.cause_col.apply(data_obj._exist, args=(cause,))
-    ].sum()
+    total_duration = data_obj.cause_total_duration[cause]
 
     if total_duration == 0:
         return 0
@@ -48,9 +48,7 @@ def lambda_comp(
     sum_duration_x_in_window = data_obj.effect_durations_when_cause_comp[
         (window_size, cause, effect)
     ]
-    total_duration_x = data_obj.duration_col[
-        data_obj.effect_col.apply(data_obj._exist, args=(effect,))
-    ].sum()
+    total_duration_x = data_obj.effect_total_duration[effect]
     if total_duration_x == 0:
         return 0
     return sum_duration_x_in_window / total_duration_x
@@ -75,3 +73,53 @@ def circ(
     if denominator == 0:
         return 0
     return nominator / denominator
+
+
+def lambda_matrix(
+    data_obj: CIRCDurationDataObject, window_sizes: list, causes: list, effects: list
+) -> np.ndarray:
+    """lambda_ for every window size, cause and effect, as a (window size, cause, effect) array."""
+    sum_duration_y_in_window = data_obj.statistic_array(
+        "accumulated_cause_durations", window_sizes, causes, effects
+    )
+    total_duration = data_obj.event_array(data_obj.cause_total_duration, causes)[
+        :, None
+    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            total_duration != 0, sum_duration_y_in_window / total_duration, 0.0
+        )
+
+
+def lambda_comp_matrix(
+    data_obj: CIRCDurationDataObject, window_sizes: list, causes: list, effects: list
+) -> np.ndarray:
+    """lambda_comp for every window size, cause and effect, as a (window size, cause, effect) array."""
+    sum_duration_x_in_window = data_obj.statistic_array(
+        "effect_durations_when_cause_comp", window_sizes, causes, effects
+    )
+    total_duration_x = data_obj.event_array(data_obj.effect_total_duration, effects)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            total_duration_x != 0, sum_duration_x_in_window / total_duration_x, 0.0
+        )
+
+
+def circ_matrix(
+    data_obj: CIRCDurationDataObject,
+    window_sizes: list,
+    causes: list = None,
+    effects: list = None,
+) -> np.ndarray:
+    """
+    Compute CIRc(x, y) for every window size, cause and effect at once.
+
+    Returns an array of shape (window size, cause, effect), the causes and effects in
+    the order of data_obj.pair_axes(causes, effects).
+    """
+    causes, effects = data_obj.pair_axes(causes, effects)
+    nominator = lambda_matrix(data_obj, window_sizes, causes, effects)
+    denominator = lambda_comp_matrix(data_obj, window_sizes, causes, effects)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, nominator / denominator, 0.0)
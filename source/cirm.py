@@ -1,3 +1,5 @@
+import numpy as np
+
 from cirm_duration_data_object import CIRMDurationDataObject
 
 
@@ -18,9 +20,7 @@ def lambda_42(
     sum_duration_y_in_window = data_obj.accumulated_cause_durations_single_z[
         (window_size, cause, effect, z)
     ]
-    total_duration_y = data_obj.duration_col[
-        data_obj.cause_col.apply(data_obj._exist, args=(cause,))
-    ].sum()
+    total_duration_y = data_obj.cause_total_duration[cause]
 
     if total_duration_y == 0:
         return 0
@@ -46,9 +46,7 @@ def lambda_comp_43(
     sum_duration_x_in_window = data_obj.effect_durations_when_cause_comp_single_z[
         (window_size, cause, effect, z)
     ]
-    total_duration_x = data_obj.duration_col[
-        data_obj.effect_col.apply(data_obj._exist, args=(effect,))
-    ].sum()
+    total_duration_x = data_obj.effect_total_duration[effect]
 
     if total_duration_x == 0:
         return 0
@@ -105,9 +103,7 @@ def lambda_44(
     sum_duration_y_in_window = data_obj.accumulated_cause_durations_enumerated_z[
         (window_size, cause, effect, z_combination)
     ]
-    total_duration_y = data_obj.duration_col[
-        data_obj.cause_col.apply(data_obj._exist, args=(cause,))
-    ].sum()
+    total_duration_y = data_obj.cause_total_duration[cause]
 
     if total_duration_y == 0:
         return 0
@@ -137,9 +133,7 @@ def lambda_comp_45(
     sum_duration_x_in_window = data_obj.effect_durations_when_cause_comp_enumerated_z[
         (window_size, cause, effect, z_combination)
     ]
-    total_duration_x = data_obj.duration_col[
-        data_obj.effect_col.apply(data_obj._exist, args=(effect,))
-    ].sum()
+    total_duration_x = data_obj.effect_total_duration[effect]
 
     if total_duration_x == 0:
         return 0
@@ -158,6 +152,9 @@ def cirm_enumerated_z(
                       |       w      |
                       | lambda  _    |
                       --      x|y,z --
+
+    Averaged over the z combinations of the data object, which may be bounded in size or
+    sampled; "combinations" is the number of combinations evaluated.
     """
     results = []
     for z_combination in data_obj.enumerated_z_set[effect]:
@@ -174,4 +171,109 @@ def cirm_enumerated_z(
         "max": max(results) if len(results) > 0 else 0,
         "min": min(results) if len(results) > 0 else 0,
         "avg": sum(results) / len(results) if len(results) > 0 else 0,
+        "combinations": len(results),
     }
+
+
+def _cirm_matrix(
+    data_obj: CIRMDurationDataObject,
+    window_sizes: list,
+    causes: list,
+    effects: list,
+    z_set: dict,
+    nominator_name: str,
+    denominator_name: str,
+) -> dict:
+    """
+    The max, min and avg over the z (combinations) of an effect of
+    lambda_x|y,z / lambda_x|y,z_comp, as (window size, cause, effect) arrays, plus the
+    number of z (combinations) of every effect.
+    """
+    shape = (len(window_sizes), len(causes), len(effects))
+    scores = {"max": np.zeros(shape), "min": np.zeros(shape), "avg": np.zeros(shape)}
+    scores["combinations"] = np.zeros(len(effects), dtype=np.int64)
+    total_duration_y = data_obj.event_array(data_obj.cause_total_duration, causes)[
+        :, None
+    ]
+
+    for e, effect in enumerate(effects):
+        zs = z_set[effect]
+        scores["combinations"][e] = len(zs)
+        if len(zs) == 0:
+            continue
+        sum_duration_y_in_window = data_obj.z_statistic_array(
+            nominator_name, window_sizes, causes, effect, zs
+        )
+        sum_duration_x_in_window = data_obj.z_statistic_array(
+            denominator_name, window_sizes, causes, effect, zs
+        )
+        total_duration_x = data_obj.effect_total_duration[effect]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nominator = np.where(
+                total_duration_y != 0, sum_duration_y_in_window / total_duration_y, 0.0
+            )
+            if total_duration_x == 0:
+                denominator = np.zeros_like(sum_duration_x_in_window)
+            else:
+                denominator = sum_duration_x_in_window / total_duration_x
+            results = np.where(denominator != 0, nominator / denominator, 0.0)
+
+        # Summed z by z, in order, as the per-pair scores do.
+        total = np.zeros(shape[:2])
+        for i in range(len(zs)):
+            total = total + results[:, :, i]
+        scores["max"][:, :, e] = results.max(axis=2)
+        scores["min"][:, :, e] = results.min(axis=2)
+        scores["avg"][:, :, e] = total / len(zs)
+    return scores
+
+
+def cirm_single_z_matrix(
+    data_obj: CIRMDurationDataObject,
+    window_sizes: list,
+    causes: list = None,
+    effects: list = None,
+) -> dict:
+    """
+    Compute cirm_single_z for every window size, cause and effect at once.
+
+    Returns {"max", "min", "avg"} arrays of shape (window size, cause, effect), the causes
+    and effects in the order of data_obj.pair_axes(causes, effects), and the number of z
+    of every effect as "combinations".
+    """
+    causes, effects = data_obj.pair_axes(causes, effects)
+    return _cirm_matrix(
+        data_obj,
+        window_sizes,
+        causes,
+        effects,
+        {effect: data_obj.single_z_set[effect] for effect in effects},
+        "accumulated_cause_durations_single_z",
+        "effect_durations_when_cause_comp_single_z",
+    )
+
+
+def cirm_enumerated_z_matrix(
+    data_obj: CIRMDurationDataObject,
+    window_sizes: list,
+    causes: list = None,
+    effects: list = None,
+) -> dict:
+    """
+    Compute cirm_enumerated_z for every window size, cause and effect at once.
+
+    Returns {"max", "min", "avg"} arrays of shape (window size, cause, effect), the causes
+    and effects in the order of data_obj.pair_axes(causes, effects), and the number of z
+    combinations evaluated for every effect as "combinations".
+    """
+    causes, effects = data_obj.pair_axes(causes, effects)
+    return _cirm_matrix(
+        data_obj,
+        window_sizes,
+        causes,
+        effects,
+        data_obj.enumerated_z_set,
+        "accumulated_cause_durations_enumerated_z",
+        "effect_durations_when_cause_comp_enumerated_z",
+    )
@@ -1,12 +1,21 @@
 import json
-import multiprocessing as mp
+import random
+import numpy as np
 
+from math import comb
 from itertools import combinations
 
 from duration_data_object import DurationDataObject
 
 
 class CIRMDurationDataObject(DurationDataObject):
+    STATISTICS = (
+        "accumulated_cause_durations_single_z",
+        "accumulated_cause_durations_enumerated_z",
+        "effect_durations_when_cause_comp_single_z",
+        "effect_durations_when_cause_comp_enumerated_z",
+    )
+
     def __init__(
         self,
         data_path: str,
@@ -16,7 +25,30 @@ class CIRMDurationDataObject(DurationDataObject):
         window_sizes: list,
         parent_path: str,
         data_size: int = -1,
+        backend: str = "auto",
+        cache_dir: str = None,
+        jobs: int = None,
+        execution: str = "auto",
+        chunk_size: int = None,
+        max_z_order: int = None,
+        z_samples: int = None,
+        seed: int = 0,
+        time_from: int = None,
+        time_to: int = None,
+        horizon: int = None,
+        profiler=None,
     ):
+        if max_z_order is not None and max_z_order < 1:
+            raise ValueError(f"max_z_order must be at least 1, got {max_z_order}.")
+        if z_samples is not None and z_samples < 1:
+            raise ValueError(f"z_samples must be at least 1, got {z_samples}.")
+        self.max_z_order = max_z_order
+        self.z_samples = z_samples
+        self.seed = seed
+
+        self.single_z_set = self._init_z_set(parent_path) if parent_path else dict()
+        self.enumerated_z_set = self._enumerate_z()
+
         super().__init__(
             data_path,
             cause_col_name,
@@ -24,21 +56,17 @@ class CIRMDurationDataObject(DurationDataObject):
             duration_col_name,
             window_sizes,
             data_size=data_size,
+            backend=backend,
+            cache_dir=cache_dir,
+            jobs=jobs,
+            execution=execution,
+            chunk_size=chunk_size,
+            time_from=time_from,
+            time_to=time_to,
+            horizon=horizon,
+            profiler=profiler,
         )
 
-        self.single_z_set = self._init_z_set(parent_path)
-        self.enumerated_z_set = self._enumerate_z()
-
-        self.accumulated_cause_durations_single_z = dict()
-        self.accumulated_cause_durations_enumerated_z = dict()
-        self.effect_durations_when_cause_comp_single_z = dict()
-        self.effect_durations_when_cause_comp_enumerated_z = dict()
-
-        self._init_accumulated_cause_durations_single_z()
-        self._init_accumulated_cause_durations_enumerated_z()
-        self._init_effect_durations_when_cause_comp_single_z()
-        self._init_effect_durations_when_cause_comp_enumerated_z()
-
     def _init_z_set(self, path):
         with open(path, "r") as f:
             z_set = json.load(f)
@@ -67,226 +95,250 @@ class CIRMDurationDataObject(DurationDataObject):
         # }
 
     def _enumerate_z(self):
+        """
+        Enumerate the z combinations of every effect: all non-empty subsets of its parents
+        of size at most max_z_order, or, with z_samples, at most z_samples of them drawn
+        uniformly at random (reproducibly, from seed) when there are more.
+        """
+        rng = random.Random(self.seed)
         new_z_set = dict()
         for effect, z_list in self.single_z_set.items():
+            max_order = min(len(z_list), self.max_z_order or len(z_list))
+            sizes = range(1, max_order + 1)
+            counts = [comb(len(z_list), j) for j in sizes]
+            if self.z_samples is None or sum(counts) <= self.z_samples:
+                new_z_set[effect] = [i for j in sizes for i in combinations(z_list, j)]
+                continue
+
+            sampled = set()
+            while len(sampled) < self.z_samples:
+                (j,) = rng.choices(sizes, weights=counts)
+                sampled.add(tuple(sorted(rng.sample(range(len(z_list)), j))))
             new_z_set[effect] = [
-                i for j in range(1, len(z_list) + 1) for i in combinations(z_list, j)
+                tuple(z_list[position] for position in positions)
+                for positions in sorted(sampled, key=lambda c: (len(c), c))
             ]
         return new_z_set
 
-    def _init_accumulated_cause_durations_single_z(self):
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_accumulated_cause_durations_single_z,
-                [
-                    (cause, effect, z, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                    for z in self.single_z_set[effect]
-                ],
+    def _single_z_keys(self, effect):
+        return [
+            (window_size, cause, effect, z)
+            for window_size in self.window_sizes
+            for cause in self.cause_set
+            for z in self.single_z_set[effect]
+        ]
+
+    def _enumerated_z_keys(self, effect):
+        return [
+            (window_size, cause, effect, z_combination)
+            for window_size in self.window_sizes
+            for cause in self.cause_set
+            for z_combination in self.enumerated_z_set[effect]
+        ]
+
+    def _z_tasks(self, name, keys, comp, single):
+        """
+        Set a z statistic of every cause to its value for a cause that never occurs, 0 or
+        with comp the one of ABSENT, and return the pending effects, whose tasks then only
+        run the causes co-occurring with them.
+        """
+        statistic = getattr(self, name)
+        causes = list(self.cause_set)
+        for effect in self.effect_set:
+            if single:
+                z_combinations = [(z,) for z in self.single_z_set[effect]]
+            else:
+                z_combinations = self.enumerated_z_set[effect]
+            if not z_combinations:
+                continue
+            values = 0
+            if comp:
+                absent = self.window_engine.z_durations(
+                    effect, [self.ABSENT], z_combinations, True
+                )
+                values = np.array(
+                    [
+                        [absent[(self.ABSENT, z)][w] for z in z_combinations]
+                        for w in self.window_sizes
+                    ],
+                    dtype=np.float64,
+                )[:, np.newaxis, :]
+            statistic.fill(
+                (
+                    self.window_sizes,
+                    causes,
+                    [(effect, z[0] if single else z) for z in z_combinations],
+                ),
+                values,
+            )
+        return self._pending(name, list(self.effect_set), keys)
+
+    def _calc_z_durations(self, effect, z_combinations, comp, single):
+        """
+        Run the window engine over every cause, z combination and window size of an effect;
+        single z statistics are keyed by the z itself instead of a 1-tuple. Only the causes
+        co-occurring with the effect are run, the others are set by _z_tasks.
+        """
+        cooccurrences = self.window_engine.cooccurrences()
+        causes = [
+            cause for cause in self.cause_set if effect in cooccurrences.get(cause, ())
+        ]
+        if not causes:
+            return []
+        durations = self.window_engine.z_durations(effect, causes, z_combinations, comp)
+        return [
+            (
+                (
+                    window_size,
+                    cause,
+                    effect,
+                    z_combination[0] if single else z_combination,
+                ),
+                by_window[window_size],
             )
+            for (cause, z_combination), by_window in durations.items()
+            for window_size in self.window_sizes
+        ]
+
+    def _init_accumulated_cause_durations_single_z(self):
+        results = self.executor.map(
+            "_calc_accumulated_cause_durations_single_z",
+            self._z_tasks(
+                "accumulated_cause_durations_single_z", self._single_z_keys, False, True
+            ),
+        )
         self.accumulated_cause_durations_single_z.update(
-            {result[0]: result[1] for result in results}
+            {key: value for result in results for key, value in result}
         )
 
     def _calc_accumulated_cause_durations_single_z(self, *args):
         """
-        Compute:
+        Compute, for every cause, z and window size at once:
             sum_duration_y_in_window(Nw(y, z <- x))
             Given x occurs, if y and z occurred in the previous window, accumulate the durations of all y in the previous window.
         Params:
-            args[0] = (cause, effect, z, window_size)
+            args[0] = effect
         """
-        cause, effect, z, window_size = args[0]
-        z_cols = dict()
-        if self.cause_col.apply(self._exist, args=(z,)).any():
-            z_cols[z] = self.cause_col
-        else:
-            z_cols[z] = self.effect_col
-
-        sum_durations = 0
-
-        for i in range(window_size - 1, self.T):
-            if effect in self.effect_col[i].split(", "):
-                current_window_cause = self.cause_col[i - window_size + 1 : i + 1]
-
-                if current_window_cause.apply(self._exist, args=(cause,)).any():
-                    current_window_z = z_cols[z][i - window_size + 1 : i + 1]
-
-                    if current_window_z.apply(self._exist, args=(z,)).any():
-                        current_window_durations = self.duration_col[
-                            i - window_size + 1 : i + 1
-                        ]
-                        sum_durations += current_window_durations[
-                            current_window_cause.apply(self._exist, args=(cause,))
-                        ].sum()
-        return (window_size, cause, effect, z), sum_durations
+        effect = args[0]
+        return self._calc_z_durations(
+            effect, [(z,) for z in self.single_z_set[effect]], False, True
+        )
 
     def _init_effect_durations_when_cause_comp_single_z(self):
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_effect_durations_when_cause_comp_single_z,
-                [
-                    (cause, effect, z, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                    for z in self.single_z_set[effect]
-                ],
-            )
+        results = self.executor.map(
+            "_calc_effect_durations_when_cause_comp_single_z",
+            self._z_tasks(
+                "effect_durations_when_cause_comp_single_z",
+                self._single_z_keys,
+                True,
+                True,
+            ),
+        )
         self.effect_durations_when_cause_comp_single_z.update(
-            {result[0]: result[1] for result in results}
+            {key: value for result in results for key, value in result}
         )
 
     def _calc_effect_durations_when_cause_comp_single_z(self, *args):
         """
-        Compute:
+        Compute, for every cause, z and window size at once:
                                         _
             sum_duration_x_in_window(Nw(y, z <- x))
             Given x occurs, if y didn't occur but z occurred in the previous window, accumulate the duration of x.
         Params:
-            args[0] = (cause, effect, z, window_size)
+            args[0] = effect
         """
-        cause, effect, z, window_size = args[0]
-        z_cols = dict()
-        if self.cause_col.apply(self._exist, args=(z,)).any():
-            z_cols[z] = self.cause_col
-        else:
-            z_cols[z] = self.effect_col
-
-        sum_durations = 0
-
-        for i in range(window_size - 1, self.T):
-            if effect in self.effect_col[i].split(", "):
-                current_window_cause = self.cause_col[i - window_size + 1 : i + 1]
-
-                if not current_window_cause.apply(self._exist, args=(cause,)).any():
-                    current_window_z = z_cols[z][i - window_size + 1 : i + 1]
-
-                    if current_window_z.apply(self._exist, args=(z,)).any():
-                        sum_durations += self.duration_col[i]
-        return (window_size, cause, effect, z), sum_durations
+        effect = args[0]
+        return self._calc_z_durations(
+            effect, [(z,) for z in self.single_z_set[effect]], True, True
+        )
 
     def _init_accumulated_cause_durations_enumerated_z(self):
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_accumulated_cause_durations_enumerated_z,
-                [
-                    (cause, effect, z_combination, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                    for z_combination in self.enumerated_z_set[effect]
-                ],
-            )
+        results = self.executor.map(
+            "_calc_accumulated_cause_durations_enumerated_z",
+            self._z_tasks(
+                "accumulated_cause_durations_enumerated_z",
+                self._enumerated_z_keys,
+                False,
+                False,
+            ),
+        )
         self.accumulated_cause_durations_enumerated_z.update(
-            {result[0]: result[1] for result in results}
+            {key: value for result in results for key, value in result}
         )
 
     def _calc_accumulated_cause_durations_enumerated_z(self, *args):
         """
-        Compute:
+        Compute, for every cause, z combination and window size at once:
             sum_duration_y_in_window(Nw(y, z <- x))
             Given x occurs, if y and z occurred in the previous window, accumulate the durations of all y in the previous window.
         Params:
-            args[0] = (cause, effect, z, window_size)
+            args[0] = effect
         """
-        cause, effect, z_combination, window_size = args[0]
-        z_cols = dict()
-        for z in z_combination:
-            if self.cause_col.apply(self._exist, args=(z,)).any():
-                z_cols[z] = self.cause_col
-            else:
-                z_cols[z] = self.effect_col
-
-        sum_durations = 0
-
-        for i in range(window_size - 1, self.T):
-            if effect in self.effect_col[i].split(", "):
-                current_window_cause = self.cause_col[i - window_size + 1 : i + 1]
-
-                if current_window_cause.apply(self._exist, args=(cause,)).any():
-                    z_occurrences = 0
-
-                    for z in z_combination:
-                        current_window_z = z_cols[z][i - window_size + 1 : i + 1]
-                        if current_window_z.apply(self._exist, args=(z,)).any():
-                            z_occurrences += 1
-
-                    if z_occurrences == len(z_combination):
-                        current_window_durations = self.duration_col[
-                            i - window_size + 1 : i + 1
-                        ]
-                        sum_durations += current_window_durations[
-                            current_window_cause.apply(self._exist, args=(cause,))
-                        ].sum()
-
-        return (window_size, cause, effect, z_combination), sum_durations
+        effect = args[0]
+        return self._calc_z_durations(
+            effect, self.enumerated_z_set[effect], False, False
+        )
 
     def _init_effect_durations_when_cause_comp_enumerated_z(self):
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_effect_durations_when_cause_comp_enumerated_z,
-                [
-                    (cause, effect, z_combination, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                    for z_combination in self.enumerated_z_set[effect]
-                ],
-            )
+        results = self.executor.map(
+            "_calc_effect_durations_when_cause_comp_enumerated_z",
+            self._z_tasks(
+                "effect_durations_when_cause_comp_enumerated_z",
+                self._enumerated_z_keys,
+                True,
+                False,
+            ),
+        )
         self.effect_durations_when_cause_comp_enumerated_z.update(
-            {result[0]: result[1] for result in results}
+            {key: value for result in results for key, value in result}
         )
 
     def _calc_effect_durations_when_cause_comp_enumerated_z(self, *args):
         """
-                                    _
-        sum_duration_x_in_window(Nw(y, z <- x))
+        Compute, for every cause, z combination and window size at once:
+                                        _
+            sum_duration_x_in_window(Nw(y, z <- x))
             Given x occurs, if y didn't occur but z occurred in the previous window, accumulate duration of x.
         Params:
-            args[0] = (cause, effect, z, window_size)
+            args[0] = effect
         """
-        cause, effect, z_combination, window_size = args[0]
-        z_cols = dict()
-        for z in z_combination:
-            if self.cause_col.apply(self._exist, args=(z,)).any():
-                z_cols[z] = self.cause_col
-            else:
-                z_cols[z] = self.effect_col
-
-        sum_durations = 0
-        for i in range(window_size - 1, self.T):
-            if effect in self.effect_col[i].split(", "):
-                current_window_cause = self.cause_col[i - window_size + 1 : i + 1]
-
-                if not current_window_cause.apply(self._exist, args=(cause,)).any():
-                    z_occurrences = 0
-
-                    for z in z_combination:
-                        current_window_z = z_cols[z][i - window_size + 1 : i + 1]
-                        if current_window_z.apply(self._exist, args=(z,)).any():
-                            z_occurrences += 1
-
-                    if z_occurrences == len(z_combination):
-                        sum_durations += self.duration_col[i]
-        return (window_size, cause, effect, z_combination), sum_durations
-
-    def _init_necessity(self):
-        pass
-
-    def _init_sufficiency(self):
-        pass
-
-    def _init_D(self):
-        pass
-
-    def _init_p(self):
-        pass
+        effect = args[0]
+        return self._calc_z_durations(
+            effect, self.enumerated_z_set[effect], True, False
+        )
 
-    def _init_N(self):
-        pass
+    def _column_changed(self, events):
+        """
+        A z moving to another column changes the z statistics of the effects it is a
+        parent of over the whole dataset: compute them again for these effects.
+        """
+        effects = {
+            effect
+            for effect in self.effect_set
+            if events.intersection(self.single_z_set.get(effect, ()))
+        }
+        if not effects:
+            return
+        statistics = self._tail_statistics(
+            self.event_index, self.durations, self.cause_set | {self.ABSENT}, effects
+        )
+        for name, values in statistics.items():
+            if name not in CIRMDurationDataObject.STATISTICS:
+                continue
+            for key, value in values.items():
+                if key[1] == self.ABSENT:
+                    self._absent[name][key] = value
+                else:
+                    getattr(self, name)[key] = value
+
+    def z_statistic_array(self, name, window_sizes, causes, effect, z_set):
+        """
+        Return a (window size, cause, effect, z) statistic of one effect as a float array
+        of shape (len(window_sizes), len(causes), len(z_set)).
+        """
+        return getattr(self, name).array(
+            window_sizes, causes, [(effect, z) for z in z_set]
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from event_index import CAUSE, EFFECT, EventIndex
+
+# Version of the on-disk layout; datasets written by another version are rejected.
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def is_columnar(path: str) -> bool:
+    """Check whether a path is a dataset written by convert()."""
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def convert(
+    data_path: str,
+    out_path: str,
+    cause_col_name: str,
+    effect_col_name: str,
+    duration_col_name: str,
+    chunk_size: int = 100000,
+):
+    """
+    Convert a duration CSV into a columnar dataset directory: one .npy file per array
+    plus a manifest with the vocabulary. The arrays are, for the cause and the effect
+    column, the events of every row (CSR: {column}_indptr, {column}_ids, ids into the
+    vocabulary) and the occurrence rows of every event ({column}_event_indptr,
+    {column}_event_rows), and the duration, start and end columns (start and end if the
+    CSV has them). The CSV is read in chunks of chunk_size rows.
+    """
+    header = pd.read_csv(data_path, nrows=0).columns
+    bounds = [name for name in ("start", "end") if name in header]
+    event_index = EventIndex()
+    columns = {name: [] for name in ["duration"] + bounds}
+
+    for chunk in pd.read_csv(
+        data_path,
+        usecols=[cause_col_name, effect_col_name, duration_col_name] + bounds,
+        chunksize=chunk_size,
+    ):
+        event_index.add(chunk[cause_col_name], chunk[effect_col_name])
+        columns["duration"].append(chunk[duration_col_name].to_numpy())
+        for name in bounds:
+            columns[name].append(chunk[name].to_numpy())
+    event_index.build()
+
+    arrays = {
+        name: np.concatenate(parts) if parts else np.empty(0)
+        for name, parts in columns.items()
+    }
+    for column, indptr, ids in (
+        (CAUSE, event_index.cause_indptr, event_index.cause_ids),
+        (EFFECT, event_index.effect_indptr, event_index.effect_ids),
+    ):
+        event_indptr, event_rows = event_index.occurrence_arrays(indptr, ids)
+        arrays[f"{column}_indptr"] = indptr
+        arrays[f"{column}_ids"] = ids
+        arrays[f"{column}_event_indptr"] = event_indptr
+        arrays[f"{column}_event_rows"] = event_rows
+
+    os.makedirs(out_path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_path, f"{name}.npy"), array)
+    # The manifest is written last: a dataset without one is not recognized.
+    manifest = {
+        "format": FORMAT_VERSION,
+        "source": os.path.basename(data_path),
+        "columns": {
+            "cause": cause_col_name,
+            "effect": effect_col_name,
+            "duration": duration_col_name,
+        },
+        "T": event_index.T,
+        "arrays": sorted(arrays),
+        "vocabulary": event_index.events,
+    }
+    with open(os.path.join(out_path, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+
+
+class ColumnarDataset:
+    """
+    A dataset written by convert(). Its arrays are memory-mapped read-only, so opening it
+    reads only the manifest, and worker processes share the pages of the arrays.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST), "r") as f:
+            manifest = json.load(f)
+        if manifest["format"] != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has format {manifest['format']}, expected {FORMAT_VERSION}; convert it again."
+            )
+        self.path = path
+        self.columns = manifest["columns"]
+        self.T = manifest["T"]
+        self.vocabulary = manifest["vocabulary"]
+        self.arrays = {
+            name: self._load(os.path.join(path, f"{name}.npy"))
+            for name in manifest["arrays"]
+        }
+        self.durations = self.arrays["duration"]
+        self.start = self.arrays.get("start")
+        self.end = self.arrays.get("end")
+
+    @staticmethod
+    def _load(path):
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # Empty arrays cannot be memory-mapped.
+            return np.load(path)
+
+    def check_columns(
+        self, cause_col_name: str, effect_col_name: str, duration_col_name: str
+    ):
+        """Check that the dataset was converted from the given columns."""
+        requested = {
+            "cause": cause_col_name,
+            "effect": effect_col_name,
+            "duration": duration_col_name,
+        }
+        if requested != self.columns:
+            raise ValueError(
+                f"{self.path} was converted from the columns {self.columns}, not {requested}."
+            )
+
+    def event_index(self, start: int = 0, stop: int = None) -> EventIndex:
+        """Return the event index of the rows (start to stop) of the dataset."""
+        return EventIndex.from_arrays(
+            self.vocabulary,
+            *(
+                {
+                    key: self.arrays[f"{column}_{key}"]
+                    for key in ("indptr", "ids", "event_indptr", "event_rows")
+                }
+                for column in (CAUSE, EFFECT)
+            ),
+            start=start,
+            stop=stop,
+        )
@@ -0,0 +1,67 @@
+import datetime
+import argparse
+
+from columnar_dataset import convert
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Convert a duration dataset into the columnar format read by DEC.py"
+    )
+    parser.add_argument(
+        "-I",
+        "--infile",
+        help="Path to the data file",
+        required=True,
+        nargs=1,
+        dest="in_file",
+    )
+    parser.add_argument(
+        "-O",
+        "--outdir",
+        help="Path to the directory to store the converted dataset",
+        required=True,
+        nargs=1,
+        dest="out_dir",
+    )
+    parser.add_argument(
+        "--cause",
+        help="The name of the cause column",
+        required=True,
+        dest="cause_col_name",
+    )
+    parser.add_argument(
+        "--effect",
+        help="The name of the effect column",
+        required=True,
+        dest="effect_col_name",
+    )
+    parser.add_argument(
+        "--duration",
+        help="The name of the duration column",
+        required=True,
+        dest="duration_col_name",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Read the data file in chunks of this many rows",
+        required=False,
+        default=100000,
+        type=int,
+        dest="chunk_size",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("[+] Converting the dataset.", datetime.datetime.now())
+    convert(
+        args.in_file[0],
+        args.out_dir[0],
+        args.cause_col_name,
+        args.effect_col_name,
+        args.duration_col_name,
+        args.chunk_size,
+    )
+    print("[+] Finished.", datetime.datetime.now())
@@ -0,0 +1,86 @@
+from cirm_duration_data_object import CIRMDurationDataObject
+
+# The statistics read by each score module, in computation order.
+SCORE_STATISTICS = {
+    "nst": (
+        "necessity",
+        "sufficiency",
+        "N",
+        "p",
+        "accumulated_cause_durations",
+        "accumulated_effect_durations",
+    ),
+    "cirb": ("N", "accumulated_cause_durations"),
+    "circ": ("accumulated_cause_durations", "effect_durations_when_cause_comp"),
+    "cirm": CIRMDurationDataObject.STATISTICS,
+}
+
+
+class DECDataObject(CIRMDurationDataObject):
+    """
+    A single data object shared by the nst, cirb, circ and cirm score modules.
+
+    The dataset is read and indexed once, and every statistic required by the
+    selected scores is computed once, however many of the scores read it.
+    """
+
+    def __init__(
+        self,
+        data_path: str,
+        cause_col_name: str,
+        effect_col_name: str,
+        duration_col_name: str,
+        window_sizes: list,
+        scores: list,
+        parent_path: str = None,
+        data_size: int = -1,
+        backend: str = "auto",
+        cache_dir: str = None,
+        jobs: int = None,
+        execution: str = "auto",
+        chunk_size: int = None,
+        max_z_order: int = None,
+        z_samples: int = None,
+        seed: int = 0,
+        time_from: int = None,
+        time_to: int = None,
+        horizon: int = None,
+        profiler=None,
+    ):
+        unknown_scores = [score for score in scores if score not in SCORE_STATISTICS]
+        if unknown_scores:
+            raise ValueError(
+                f"Unknown scores {unknown_scores}, expected a subset of {list(SCORE_STATISTICS)}."
+            )
+        if "cirm" in scores and not parent_path:
+            raise ValueError("The cirm score requires a parent file.")
+
+        self.scores = tuple(scores)
+        super().__init__(
+            data_path,
+            cause_col_name,
+            effect_col_name,
+            duration_col_name,
+            window_sizes,
+            parent_path,
+            data_size=data_size,
+            backend=backend,
+            cache_dir=cache_dir,
+            jobs=jobs,
+            execution=execution,
+            chunk_size=chunk_size,
+            max_z_order=max_z_order,
+            z_samples=z_samples,
+            seed=seed,
+            time_from=time_from,
+            time_to=time_to,
+            horizon=horizon,
+            profiler=profiler,
+        )
+
+    def _required_statistics(self):
+        return tuple(
+            dict.fromkeys(
+                name for score in self.scores for name in SCORE_STATISTICS[score]
+            )
+        )
@@ -1,12 +1,28 @@
 import os
+import copy
+import numpy as np
 import pandas as pd
-import multiprocessing as mp
 
-from itertools import chain
+from contextlib import contextmanager
 from datetime import datetime
 
+from columnar_dataset import ColumnarDataset, is_columnar
+from event_index import CAUSE, EFFECT, EventIndex
+from executor import Executor
+from profiler import NULL_PROFILER
+from statistic_store import new_statistic
+from statistics_cache import KEY_SCHEMAS, StatisticsCache, is_windowed
+from window_engine import BACKENDS, window_engine
+
 
 class DurationDataObject:
+    # Statistics computed at construction, in order; subclasses declare the ones their score needs.
+    STATISTICS = ("necessity", "sufficiency", "D", "N", "p")
+    # Stands for an event absent from the rows; the encoder never produces it.
+    ABSENT = ""
+    # Rebuilt on first use after append() or evict().
+    HISTORY = ("event_index", "durations", "ends", "window_engine")
+
     def __init__(
         self,
         data_path: str,
@@ -15,73 +31,812 @@ class DurationDataObject:
         duration_col_name: str,
         window_sizes: list,
         data_size: int = -1,
+        backend: str = "auto",
+        cache_dir: str = None,
+        jobs: int = None,
+        execution: str = "auto",
+        chunk_size: int = None,
+        time_from: int = None,
+        time_to: int = None,
+        horizon: int = None,
+        profiler=None,
     ):
-        self.dataset = pd.read_csv(data_path)
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}."
+            )
+        time_slice = (time_from, time_to)
+        if time_slice != (None, None):
+            if data_size > 0:
+                raise ValueError("Use either data_size or a time slice, not both.")
+            if None not in time_slice and time_from > time_to:
+                raise ValueError(
+                    f"Empty time slice: time_from {time_from} > time_to {time_to}."
+                )
         self.cause_col_name = cause_col_name
         self.effect_col_name = effect_col_name
         self.duration_col_name = duration_col_name
         self.window_sizes = window_sizes
-        if data_size > 0 and data_size < self.dataset.shape[0]:
-            self._read_dataset_with_size(data_size)
+        self.chunk_size = chunk_size
+        self.horizon = horizon
+        # The end of every row, kept in horizon mode only.
+        self.ends = None
+        # Records the phases of the construction, see profiler.Profiler.
+        self.profiler = profiler or NULL_PROFILER
 
-        if data_size > 0:
-            self.cause_col = self.dataset[cause_col_name].iloc[:data_size]
-            self.effect_col = self.dataset[effect_col_name].iloc[:data_size]
-            self.duration_col = self.dataset[duration_col_name].iloc[:data_size]
+        if not isinstance(data_path, str):
+            # DataFrame chunks of duration rows, e.g. preprocessing.duration_chunks(...).
+            with self.profiler.phase("read_dataset"):
+                self.durations, self.event_index = self._stream_dataset(
+                    data_path, data_size, time_slice
+                )
+        elif is_columnar(data_path):
+            with self.profiler.phase("read_dataset"):
+                self.durations, self.event_index = self._open_columnar(
+                    data_path, data_size, time_slice
+                )
+        elif chunk_size:
+            with self.profiler.phase("read_dataset"):
+                self.durations, self.event_index = self._stream_dataset(
+                    data_path, data_size, time_slice, chunk_size
+                )
         else:
-            self.cause_col = self.dataset[cause_col_name]
-            self.effect_col = self.dataset[effect_col_name]
-            self.duration_col = self.dataset[duration_col_name]
+            with self.profiler.phase("read_csv"):
+                self._read_dataset(data_path, data_size, time_slice)
+            with self.profiler.phase("parse_events"):
+                self.durations = self.duration_col.to_numpy()
+                self.event_index = EventIndex(self.cause_col, self.effect_col)
+                if horizon is not None:
+                    self.ends = self.dataset["end"].to_numpy()
+        with self.profiler.phase("index_events"):
+            if horizon is not None:
+                self._trim_to_horizon()
+            self.backend = backend
+            self.window_engine = window_engine(
+                backend, self.event_index, self.durations, self.window_sizes
+            )
+
+            self.cause_set = self._init_cause_set()
+            self.effect_set = self._init_effect_set()
+            self.cause_total_duration = self._init_total_duration(CAUSE)
+            self.effect_total_duration = self._init_total_duration(EFFECT)
+
+        for name in DurationDataObject.STATISTICS:
+            setattr(self, name, self._new_statistic(name))
+        self.T = len(self.durations)
+
+        self.cache = None
+        self._cached, cached_windows = dict(), dict()
+        if cache_dir:
+            if not isinstance(data_path, str):
+                raise ValueError("Caching the statistics requires a data file.")
+            self.cache = StatisticsCache(
+                cache_dir,
+                data_path,
+                cause_col_name,
+                effect_col_name,
+                duration_col_name,
+                data_size,
+                self.window_engine.backend,
+                time_slice,
+                horizon,
+            )
+            with self.profiler.phase("load_cache"):
+                self._cached, cached_windows = self.cache.load()
+
+        self.statistics = self._required_statistics()
+        for name in self.statistics:
+            if not hasattr(self, name):
+                setattr(self, name, self._new_statistic(name))
+
+        self.executor = Executor(self, jobs, execution)
+        try:
+            for name in self.statistics:
+                with self.profiler.phase(f"_init_{name}"):
+                    self._init_statistic(name, cached_windows.get(name, set()))
+        finally:
+            with self.profiler.phase("close_pool"):
+                self.executor.close()
+
+        if self.cache is not None:
+            with self.profiler.phase("save_cache"):
+                self._save_cache(cached_windows)
+        self._cached = dict()
+        self._history = None
+
+    def _read_dataset(self, data_path, data_size, time_slice):
+        """Read the whole dataset into memory and keep the rows of data_size or time_slice."""
+        dataset = pd.read_csv(data_path)
+        lo, hi, head, tail = 0, dataset.shape[0], 0, 0
+        if 0 < data_size < dataset.shape[0]:
+            hi, tail = self._size_cut(dataset["end"].to_numpy(), data_size)
+        elif time_slice != (None, None):
+            lo, hi, head, tail = self._time_slice(
+                self._bound(dataset, "start", time_slice[0]),
+                dataset["end"].to_numpy(),
+                *time_slice,
+            )
+
+        # A view of the kept rows; the clipped durations are only in duration_col.
+        self.dataset = dataset.iloc[lo:hi]
+        self.cause_col = self.dataset[self.cause_col_name]
+        self.effect_col = self.dataset[self.effect_col_name]
+        self.duration_col = pd.Series(
+            self._clip(self.dataset[self.duration_col_name].to_numpy(), head, tail),
+            index=self.dataset.index,
+            name=self.duration_col_name,
+        )
 
         self.cause_col = self.cause_col.apply(self._nan_to_str)
         self.effect_col = self.effect_col.apply(self._nan_to_str)
 
-        self.cause_set = self._init_cause_set()
-        self.effect_set = self._init_effect_set()
+    def _stream_dataset(self, data_path, data_size, time_slice, chunk_size=None):
+        """
+        Read the dataset in chunks of chunk_size rows, encoding every chunk into the event
+        index as it is read, so only the encoded events and the durations are kept.
+        data_path may also be an iterable of DataFrame chunks, e.g. the duration rows
+        produced by preprocessing.duration_chunks. Return the durations and the event
+        index. data_size and time_slice truncate the dataset as in memory; reading stops
+        once the truncation is known.
+        """
+        columns = [self.cause_col_name, self.effect_col_name, self.duration_col_name]
+        keep_ends = data_size > 0 or self.horizon is not None
+        if keep_ends or time_slice != (None, None):
+            columns.append("end")
+        if time_slice[0] is not None:
+            columns.append("start")
+        event_index = EventIndex()
+        durations, ends, n_rows = [], [], 0
+
+        if isinstance(data_path, str):
+            chunks = pd.read_csv(data_path, usecols=columns, chunksize=chunk_size)
+        else:
+            chunks = data_path
+        if time_slice != (None, None):
+            chunks = self._slice_chunks(chunks, *time_slice)
+
+        for chunk in chunks:
+            if data_size > 0:
+                chunk = chunk.iloc[: data_size + 1 - n_rows]
+            if keep_ends:
+                ends.append(chunk["end"].to_numpy())
+            event_index.add(chunk[self.cause_col_name], chunk[self.effect_col_name])
+            durations.append(chunk[self.duration_col_name].to_numpy())
+            n_rows += len(chunk)
+            if data_size > 0 and n_rows > data_size:
+                break
+
+        durations = np.concatenate(durations) if durations else np.empty(0)
+        ends = np.concatenate(ends) if ends else np.empty(0, dtype=np.int64)
+        T = n_rows
+        if 0 < data_size < n_rows:
+            T, tail = self._size_cut(ends, data_size)
+            durations = self._clip(durations[:T], 0, tail)
+        if self.horizon is not None:
+            self.ends = ends[:T]
+        event_index.build(stop=T)
+        return durations, event_index
+
+    def _slice_chunks(self, chunks, time_from, time_to):
+        """
+        Yield the rows of consecutive DataFrame chunks within the time slice
+        [time_from, time_to], with the durations of the first and the last row clipped
+        to it, and stop at the chunk reaching time_to.
+        """
+        for chunk in chunks:
+            ends = chunk["end"].to_numpy()
+            lo, hi, head, tail = self._time_slice(
+                self._bound(chunk, "start", time_from), ends, time_from, time_to
+            )
+            if hi > lo:
+                chunk = chunk.iloc[lo:hi]
+                if head or tail:
+                    chunk = chunk.assign(
+                        **{
+                            self.duration_col_name: self._clip(
+                                chunk[self.duration_col_name].to_numpy(), head, tail
+                            )
+                        }
+                    )
+                yield chunk
+                # The rest of the dataset is within the slice as far as time_from goes.
+                time_from = None
+            if time_to is not None and len(ends) > 0 and ends[-1] >= time_to:
+                return
+
+    def _open_columnar(self, data_path, data_size, time_slice):
+        """
+        Open a dataset converted by convert.py, memory-mapping its arrays instead of
+        reading them. Return the durations and the event index. data_size and time_slice
+        truncate the dataset as in memory.
+        """
+        dataset = ColumnarDataset(data_path)
+        dataset.check_columns(
+            self.cause_col_name, self.effect_col_name, self.duration_col_name
+        )
+        lo, hi, head, tail = 0, dataset.T, 0, 0
+        if (
+            0 < data_size < dataset.T
+            or time_slice != (None, None)
+            or self.horizon is not None
+        ):
+            if dataset.end is None:
+                raise ValueError(f"{data_path} has no end column to truncate it.")
+            if 0 < data_size < dataset.T:
+                hi, tail = self._size_cut(dataset.end, data_size)
+            elif time_slice != (None, None):
+                if time_slice[0] is not None and dataset.start is None:
+                    raise ValueError(f"{data_path} has no start column to slice it.")
+                lo, hi, head, tail = self._time_slice(
+                    dataset.start, dataset.end, *time_slice
+                )
+        durations = self._clip(dataset.durations[lo:hi], head, tail)
+        if self.horizon is not None:
+            self.ends = dataset.end[lo:hi]
+        return durations, dataset.event_index(lo, hi)
 
-        self.necessity = dict()
-        self.sufficiency = dict()
-        self.N = dict()
-        self.D = dict()
-        self.p = dict()
-        self.T = len(self.cause_col)
+    def _trim_to_horizon(self):
+        """Drop the rows read that end before the horizon, horizon time units before the last end."""
+        if len(self.ends) == 0:
+            return
+        start = self._expired(self.ends)
+        if start > 0:
+            self.event_index = EventIndex.from_chunks(
+                self.event_index.events,
+                [
+                    (
+                        (self.event_index.cause_indptr, self.event_index.cause_ids),
+                        (self.event_index.effect_indptr, self.event_index.effect_ids),
+                    )
+                ],
+                start,
+            )
+            self.durations, self.ends = self.durations[start:], self.ends[start:]
 
-        self._init_necessity()
-        self._init_sufficiency()
-        self._init_D()
-        self._init_N()
-        self._init_p()
+    def _expired(self, ends, last_end=None):
+        """Count the rows, by binary search on the sorted ends, that end before the horizon."""
+        if last_end is None:
+            last_end = ends[-1]
+        return int(np.searchsorted(ends, last_end - self.horizon, side="right"))
 
     @staticmethod
-    def _nan_to_str(value):
-        if isinstance(value, str):
-            return value
-        return ""
+    def _bound(dataset, column, time):
+        """Return a start or end column of a DataFrame, if a time bound needs it."""
+        return dataset[column].to_numpy() if time is not None else None
 
-    def _read_dataset_with_size(self, size: int):
+    @staticmethod
+    def _size_cut(ends, data_size):
         """
-        Read the dataset with a specific size.
+        Truncate a dataset of more than data_size rows at the first row whose end reaches
+        data_size, found by binary search on the sorted ends, and to at most data_size
+        rows. Return the number of kept rows and the duration to clip from the last one.
         """
-        for i in range(self.dataset.shape[0]):
-            if self.dataset["end"][i] > size:
-                self.dataset = self.dataset.iloc[: i + 1]
-                self.dataset[self.duration_col_name][i] -= self.dataset["end"][i] - size
+        cut = int(np.searchsorted(ends[:data_size], data_size))
+        if cut == min(data_size, len(ends)):
+            return data_size, 0
+        return cut + 1, ends[cut] - data_size
+
+    @staticmethod
+    def _time_slice(starts, ends, time_from=None, time_to=None):
+        """
+        Locate by binary search on the sorted ends the rows overlapping the time slice
+        [time_from, time_to]: from the first row ending at or after time_from to the first
+        row ending at or after time_to. Return the rows lo:hi and the durations to clip
+        from the first and the last of them so they lie within the slice.
+        """
+        lo, hi, head, tail = 0, len(ends), 0, 0
+        if time_from is not None:
+            lo = int(np.searchsorted(ends, time_from))
+            if lo < len(ends) and starts[lo] < time_from:
+                head = time_from - starts[lo]
+        if time_to is not None:
+            cut = int(np.searchsorted(ends, time_to))
+            if cut < len(ends):
+                hi, tail = cut + 1, ends[cut] - time_to
+        return lo, max(hi, lo), head, tail
+
+    @staticmethod
+    def _clip(durations, head, tail):
+        """
+        Return the durations, a copy with head clipped from the first and tail from the
+        last if either is non-zero, else as is.
+        """
+        if len(durations) == 0 or not (head or tail):
+            return durations
+        durations = np.array(durations)
+        durations[0] -= head
+        durations[-1] -= tail
+        return durations
+
+    def _required_statistics(self):
+        """Return the names of the statistics to compute, in order."""
+        return self.STATISTICS
+
+    @staticmethod
+    def _new_statistic(name):
+        """An empty statistic: a StatisticArray if it is windowed, else a dict by event."""
+        return new_statistic(KEY_SCHEMAS[name])
+
+    def _init_statistic(self, name, cached_windows):
+        """
+        Initialize a statistic, reusing the cached values: for the window sizes already
+        in the cache only the tasks missing from it are computed, the new window sizes
+        are computed entirely.
+        """
+        init = getattr(self, f"_init_{name}")
+        if not self._cached.get(name) or not is_windowed(name):
+            init()
+            return
+
+        for window_sizes in (
+            [w for w in self.window_sizes if w in cached_windows],
+            [w for w in self.window_sizes if w not in cached_windows],
+        ):
+            if window_sizes:
+                with self._restricted_windows(window_sizes):
+                    init()
+
+    @contextmanager
+    def _restricted_windows(self, window_sizes):
+        """Temporarily compute the windowed statistics for a subset of the window sizes."""
+        all_window_sizes, engine = self.window_sizes, self.window_engine
+        self.window_sizes = window_sizes
+        self.window_engine = window_engine(
+            self.backend, self.event_index, self.durations, window_sizes
+        )
+        try:
+            yield
+        finally:
+            self.window_sizes, self.window_engine = all_window_sizes, engine
+
+    def _pending(self, name, tasks, keys=None):
+        """
+        Fill a statistic with the cached results of the tasks and return the tasks
+        that still have to be computed. keys(task) lists the keys a task produces.
+        """
+        cached = self._cached.get(name)
+        if not cached:
+            return tasks
+        if keys is None:
+            keys = self._window_keys
+
+        statistic = getattr(self, name)
+        pending = []
+        for task in tasks:
+            task_keys = keys(task)
+            if all(key in cached for key in task_keys):
+                statistic.update((key, cached[key]) for key in task_keys)
+            else:
+                pending.append(task)
+        return pending
+
+    def _pair_tasks(self, name, absent=None):
+        """
+        Set a (window size, cause, effect) statistic of every pair to its value for a
+        cause that never occurs, 0 or absent(ABSENT, effect) by window size, and return
+        the pending (cause, effect) tasks of the pairs co-occurring within the largest
+        window size, the only ones whose value can differ from it.
+        """
+        causes, effects = list(self.cause_set), list(self.effect_set)
+        values = 0
+        if absent is not None:
+            by_effect = [absent(self.ABSENT, effect) for effect in effects]
+            values = np.array(
+                [[value[w] for value in by_effect] for w in self.window_sizes],
+                dtype=np.float64,
+            )[:, np.newaxis, :]
+        getattr(self, name).fill((self.window_sizes, causes, effects), values)
+
+        cooccurrences = self.window_engine.cooccurrences()
+        return self._pending(
+            name,
+            [
+                (cause, effect)
+                for cause in causes
+                for effect in cooccurrences.get(cause, set()) & self.effect_set
+            ],
+        )
+
+    def _run_tasks(self, method_name, window_sizes, tasks):
+        """Run a chunk of tasks in a worker, for the window sizes of the caller."""
+        method = getattr(self, method_name)
+        if window_sizes == self.window_sizes:
+            return [method(task) for task in tasks]
+        with self._restricted_windows(window_sizes):
+            return [method(task) for task in tasks]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["executor"] = None
+        state["profiler"] = NULL_PROFILER
+        return state
+
+    def __getattr__(self, name):
+        if name in self.HISTORY and self.__dict__.get("_history"):
+            self._rebuild_history()
+            return self.__dict__[name]
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def append(self, rows: pd.DataFrame):
+        """
+        Append duration rows (with the cause, effect and duration columns) to the dataset
+        and update T, N, p, the total durations and the windowed statistics in place, in
+        time proportional to the rows appended rather than to the dataset; the scores can
+        be computed again right after. In horizon mode the rows also need an end column,
+        and the rows ending before the horizon are evicted afterwards.
+
+        Every window spans at most max(window_sizes) rows, so a statistic changes by its
+        value over the last max(window_sizes) rows of history plus the new rows minus its
+        value over those rows of history alone. Both are computed on these rows only; a
+        cause absent from them changes like ABSENT, an event that never occurs, whose
+        statistics are kept for the causes the new rows introduce. The event index, the
+        durations and the window engine of the whole dataset are rebuilt on first use.
+        """
+        if len(rows) == 0:
+            return
+        if self._history is None:
+            self._start_history()
+        chunk = self._vocabulary.encode(
+            rows[self.cause_col_name], rows[self.effect_col_name]
+        )
+        durations = rows[self.duration_col_name].to_numpy()
+        ends = rows["end"].to_numpy() if self.horizon is not None else None
+
+        tail, start = self._history_tail(max(self.window_sizes))
+        encoded = [part[:2] for part in tail]
+        old_causes, old_effects = set(self.cause_set), set(self.effect_set)
+        before = EventIndex.from_chunks(
+            self._vocabulary.events, encoded, start, cause_events=old_causes
+        )
+        self._history.append((*chunk, durations, ends))
+        counts = {
+            column: self._event_counts(ids)
+            for column, (_, ids) in zip((CAUSE, EFFECT), chunk)
+        }
+        self.cause_set |= set(counts[CAUSE])
+        self.effect_set |= set(counts[EFFECT])
+        after = EventIndex.from_chunks(
+            self._vocabulary.events,
+            encoded + [chunk],
+            start,
+            cause_events=set(self.cause_set),
+        )
+
+        tail_durations = np.concatenate([part[2] for part in tail])[start:]
+        after_durations = np.concatenate([tail_durations, durations])
+        self._apply_change(before, tail_durations, after, after_durations, old_causes)
+        self.T += len(durations)
+        self._count_events(
+            counts, after, after_durations, len(tail_durations), after.T, 1
+        )
+        self._update_p()
+        self._forget_history()
+        self._column_changed((set(counts[CAUSE]) - old_causes) & old_effects)
+
+        if self.horizon is not None:
+            self.evict(self._expired_rows())
+
+    def evict(self, n_rows: int):
+        """
+        Remove the n_rows oldest rows of the dataset and update T, N, p, the total
+        durations and the windowed statistics in place, in time proportional to the rows
+        removed; events that no longer occur are dropped from the statistics.
+
+        As in append(), a statistic changes by its value over the first
+        n_rows + max(window_sizes) rows without the rows removed minus its value over
+        those rows.
+        """
+        n_rows = min(n_rows, self.T)
+        if n_rows <= 0:
+            return
+        if self._history is None:
+            self._start_history()
+
+        head, stop = self._history_head(n_rows + max(self.window_sizes))
+        encoded = [part[:2] for part in head]
+        old_causes, old_effects = set(self.cause_set), set(self.effect_set)
+        before = EventIndex.from_chunks(
+            self._vocabulary.events, encoded, 0, stop, cause_events=old_causes
+        )
+        counts = {
+            column: self._event_counts(ids[: indptr[n_rows]])
+            for column, (indptr, ids) in (
+                (CAUSE, (before.cause_indptr, before.cause_ids)),
+                (EFFECT, (before.effect_indptr, before.effect_ids)),
+            )
+        }
+        head_durations = np.concatenate([part[2] for part in head])[:stop]
+        self._count_events(counts, before, head_durations, 0, n_rows, -1)
+        gone = {
+            column: {
+                event for event in counts[column] if self._counts[column][event] == 0
+            }
+            for column in (CAUSE, EFFECT)
+        }
+        self.cause_set -= gone[CAUSE]
+        self.effect_set -= gone[EFFECT]
+        after = EventIndex.from_chunks(
+            self._vocabulary.events,
+            encoded,
+            n_rows,
+            stop,
+            cause_events=set(self.cause_set),
+        )
+
+        self._apply_change(
+            before, head_durations, after, head_durations[n_rows:], old_causes
+        )
+        self.T -= n_rows
+        self._drop_events(gone)
+        self._update_p()
+        self._drop_history(n_rows)
+        self._forget_history()
+        self._column_changed(gone[CAUSE] & self.effect_set)
+
+    def _start_history(self):
+        """Keep the encoded rows of the dataset, the chunks append() adds to."""
+        index = self.event_index
+        self._vocabulary = index
+        self._history = [
+            (
+                (index.cause_indptr, index.cause_ids),
+                (index.effect_indptr, index.effect_ids),
+                self.durations,
+                self.ends,
+            )
+        ]
+        self._counts = {
+            column: {event: index.count(event, column) for event in index.events}
+            for column in (CAUSE, EFFECT)
+        }
+        self._absent = self._tail_statistics(
+            index, self.durations, {self.ABSENT}, set(self.effect_set)
+        )
+
+    def _history_tail(self, n_rows):
+        """Return the last chunks of history holding the last n_rows rows, and where those start."""
+        chunks, count = [], 0
+        for chunk in reversed(self._history):
+            chunks.insert(0, chunk)
+            count += len(chunk[2])
+            if count >= n_rows:
+                break
+        return chunks, max(count - n_rows, 0)
+
+    def _history_head(self, n_rows):
+        """Return the first chunks of history holding the first n_rows rows, and where those stop."""
+        chunks, count = [], 0
+        for chunk in self._history:
+            chunks.append(chunk)
+            count += len(chunk[2])
+            if count >= n_rows:
                 break
-            elif self.dataset["end"][i] == size:
-                self.dataset = self.dataset.iloc[: i + 1]
+        return chunks, min(count, n_rows)
+
+    def _drop_history(self, n_rows):
+        """Drop the first n_rows rows from the chunks of history."""
+        while n_rows > 0:
+            cause, effect, durations, ends = self._history[0]
+            if len(durations) <= n_rows:
+                self._history.pop(0)
+                n_rows -= len(durations)
+                continue
+            self._history[0] = (
+                EventIndex.slice_rows(cause, n_rows),
+                EventIndex.slice_rows(effect, n_rows),
+                durations[n_rows:],
+                ends[n_rows:] if ends is not None else None,
+            )
+            break
+
+    def _expired_rows(self):
+        """Count the rows of history that end before the horizon."""
+        last_end, count = self._history[-1][3][-1], 0
+        for chunk in self._history:
+            expired = self._expired(chunk[3], last_end)
+            count += expired
+            if expired < len(chunk[3]):
                 break
+        return count
+
+    def _forget_history(self):
+        """Drop the event index, durations and window engine of the dataset, rebuilt on first use."""
+        for name in self.HISTORY:
+            self.__dict__.pop(name, None)
+
+    def _rebuild_history(self):
+        """Index the whole dataset again from the encoded chunks of history."""
+        index = EventIndex.from_chunks(
+            self._vocabulary.events, [chunk[:2] for chunk in self._history]
+        )
+        durations = np.concatenate([chunk[2] for chunk in self._history])
+        ends = None
+        if self.horizon is not None:
+            ends = np.concatenate([chunk[3] for chunk in self._history])
+        self._vocabulary = index
+        self._history = [
+            (
+                (index.cause_indptr, index.cause_ids),
+                (index.effect_indptr, index.effect_ids),
+                durations,
+                ends,
+            )
+        ]
+        self.event_index, self.durations, self.ends = index, durations, ends
+        self.window_engine = window_engine(
+            self.backend, index, durations, self.window_sizes
+        )
+
+    def _apply_change(self, before, before_durations, after, after_durations, causes):
+        """
+        Add the change of the windowed statistics from the rows of one event index to the
+        rows of another to the statistics; causes are the causes of the dataset before.
+        """
+        changed_causes = before.column_events(CAUSE) | after.column_events(CAUSE)
+        changed_causes.add(self.ABSENT)
+        changed_effects = before.column_events(EFFECT) | after.column_events(EFFECT)
+        deltas = self._tail_statistics(
+            after, after_durations, changed_causes, changed_effects
+        )
+        for name, statistic in self._tail_statistics(
+            before, before_durations, changed_causes, changed_effects
+        ).items():
+            deltas[name] = {
+                key: value - statistic[key] for key, value in deltas[name].items()
+            }
+        for name, delta in deltas.items():
+            self._apply_delta(name, delta, causes, changed_causes)
+
+    def _tail_statistics(self, event_index, durations, causes, effects):
+        """
+        Compute the windowed statistics of the causes and effects over the rows of an
+        event index, on a serial copy of the data object, and return them by name.
+        """
+        tail = copy.copy(self)
+        tail.event_index, tail.durations = event_index, durations
+        tail.T = len(durations)
+        tail.window_engine = window_engine(
+            self.backend, event_index, durations, self.window_sizes
+        )
+        tail.cause_set, tail.effect_set = causes, effects
+        tail.executor = Executor(tail, 1, "serial")
+        statistics = dict()
+        for name in self.statistics:
+            if is_windowed(name):
+                setattr(tail, name, self._new_statistic(name))
+                getattr(tail, f"_init_{name}")()
+                statistics[name] = getattr(tail, name)
+        return statistics
+
+    def _apply_delta(self, name, delta, old_causes, changed_causes):
+        """
+        Add the change of a statistic over some rows to it. Keys are (window size, cause,
+        *rest); a cause not in the rows changes by the change of ABSENT, and a cause new
+        to the dataset starts from the value of ABSENT (0 for a new effect).
+        """
+        statistic, absent = getattr(self, name), self._absent[name]
+        statistic.add(
+            (
+                key,
+                value
+                if key[1] in old_causes
+                else absent.get((key[0], self.ABSENT, *key[2:]), 0) + value,
+            )
+            for key, value in delta.items()
+            if key[1] != self.ABSENT
+        )
+        if len(KEY_SCHEMAS[name]) == 2:
+            return
+
+        new_causes = changed_causes - old_causes - {self.ABSENT}
+        statistic.setdefault_across(1, new_causes, absent.items())
+        # ABSENT is in no window, so its change is 0 for most statistics; the keys of a
+        # new effect are still set for every cause.
+        changes = [
+            (key, value)
+            for key, value in delta.items()
+            if key[1] == self.ABSENT and (value != 0 or key not in absent)
+        ]
+        statistic.add_across(1, old_causes - changed_causes, changes)
+        absent.add(changes)
+
+    def _event_counts(self, ids):
+        """Count the rows of an encoded column in which every event occurs."""
+        event_ids, counts = np.unique(ids, return_counts=True)
+        return {
+            self._vocabulary.events[event_id]: int(count)
+            for event_id, count in zip(event_ids, counts)
+        }
+
+    def _count_events(self, counts, event_index, durations, start, stop, sign):
+        """
+        Add (sign 1) or remove (sign -1) the rows start to stop of an event index, whose
+        events counts counts by column, to the occurrence counts, N and the total durations.
+        """
+        for column, column_counts in counts.items():
+            for event, count in column_counts.items():
+                self._counts[column][event] = (
+                    self._counts[column].get(event, 0) + sign * count
+                )
+        events = set(counts[CAUSE]) | set(counts[EFFECT])
+        for event in events:
+            for column, table in (
+                (CAUSE, self.cause_total_duration),
+                (EFFECT, self.effect_total_duration),
+            ):
+                rows = event_index.rows_in(event, column, start, stop)
+                table[event] = table.get(event, 0) + sign * durations[rows].sum()
+        if "N" in self.statistics:
+            for event in events:
+                column = CAUSE if self._counts[CAUSE].get(event, 0) > 0 else EFFECT
+                self.N[event] = self._counts[column][event]
+
+    def _update_p(self):
+        if "p" in self.statistics:
+            self.p.update(self._calc_p(event) for event in self.N)
+
+    def _drop_events(self, gone):
+        """Drop the statistics of the events gone from a column (by column)."""
+        if not gone[CAUSE] and not gone[EFFECT]:
+            return
+        events = self.cause_set | self.effect_set
+        for event in (gone[CAUSE] | gone[EFFECT]) - events:
+            for table in (
+                self.N,
+                self.p,
+                self.cause_total_duration,
+                self.effect_total_duration,
+            ):
+                table.pop(event, None)
+        for name in self.statistics:
+            if not is_windowed(name):
+                continue
+            for statistic in (getattr(self, name), self._absent[name]):
+                statistic.drop_events(gone[CAUSE], gone[EFFECT])
+
+    def _column_changed(self, events):
+        """
+        Called by append() and evict() with the events looked up in another column from
+        now on: an event is looked up in the cause column if it occurs there at all, else
+        in the effect column.
+        """
+
+    def _window_keys(self, task):
+        events = task if isinstance(task, tuple) else (task,)
+        return [(window_size, *events) for window_size in self.window_sizes]
+
+    def _save_cache(self, cached_windows):
+        """Merge the statistics of this run into the cache entry of the dataset."""
+        statistics, windows = dict(self._cached), dict(cached_windows)
+        for name in self.statistics:
+            statistics[name] = {**self._cached.get(name, dict()), **getattr(self, name)}
+            if is_windowed(name):
+                windows[name] = cached_windows.get(name, set()) | set(self.window_sizes)
+        self.cache.save(statistics, windows)
+
+    @staticmethod
+    def _nan_to_str(value):
+        if isinstance(value, str):
+            return value
+        return ""
 
     def _init_cause_set(self):
-        cause_list = list(map(lambda items: items.split(", "), set(self.cause_col)))
-        cause_set = set(list(chain(*cause_list)))
-        cause_set.discard("")
-        return cause_set
+        return self.event_index.column_events(CAUSE)
 
     def _init_effect_set(self):
-        effect_list = list(map(lambda items: items.split(", "), set(self.effect_col)))
-        effect_set = set(list(chain(*effect_list)))
-        effect_set.discard("")
-        return effect_set
+        return self.event_index.column_events(EFFECT)
+
+    def _init_total_duration(self, column):
+        """
+        total_duration(x): all durations of x in the entire dataset, i.e. the durations of
+        the rows where x occurs in the given column, for every event.
+        """
+        return {
+            event: self.durations[self.event_index.rows(event, column)].sum()
+            for event in self.cause_set | self.effect_set
+        }
 
     @staticmethod
     def _exist(cause, event):
@@ -89,131 +844,90 @@ class DurationDataObject:
 
     def _init_necessity(self):
         """Initialize a dictionary to save Nw(x <- y)."""
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_necessity,
-                [
-                    (cause, effect, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                ],
-            )
-        self.necessity.update({result[0]: result[1] for result in results})
+        results = self.executor.map(
+            "_calc_necessity",
+            self._pair_tasks("necessity"),
+        )
+        self.necessity.update(
+            {key: value for result in results for key, value in result}
+        )
 
     def _calc_necessity(self, *args):
         """
-        Compute:
+        Compute, for every window size at once:
             Nw(x <- y): given y occurs, if x occurred in the previous window, increase window_counts by 1.
         """
-        cause, effect, window_size = args[0]
-        window_counts = 0
-
-        for i in range(window_size - 1, self.T):
-            if effect in self.effect_col[i].split(", "):
-                current_window = self.cause_col[i - window_size + 1 : i + 1]
-
-                if current_window.apply(self._exist, args=(cause,)).any():
-                    window_counts += 1
-        return (
-            (window_size, cause, effect),
-            window_counts,
-        )
+        cause, effect = args[0]
+        window_counts = self.window_engine.necessity(cause, effect)
+        return self._by_window(window_counts, cause, effect)
 
     def _init_sufficiency(self):
         """Initialize a dictionary to save Nw(x -> y)."""
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_sufficiency,
-                [
-                    (cause, effect, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                    for effect in self.effect_set
-                ],
-            )
-        self.sufficiency.update({result[0]: result[1] for result in results})
+        results = self.executor.map(
+            "_calc_sufficiency",
+            self._pair_tasks("sufficiency"),
+        )
+        self.sufficiency.update(
+            {key: value for result in results for key, value in result}
+        )
 
     def _calc_sufficiency(self, *args):
         """
-        Compute:
+        Compute, for every window size at once:
             Nw(x -> y): given x occurs, if y occurs in the next window, increase window_counts by 1.
         """
-        cause, effect, window_size = args[0]
-        window_counts = 0
-
-        for i in range(self.T - window_size + 1):
-            if cause in self.cause_col[i].split(", "):
-                current_window = self.effect_col[i : i + window_size]
-
-                if current_window.apply(self._exist, args=(effect,)).any():
-                    window_counts += 1
-        return (
-            (window_size, cause, effect),
-            window_counts,
-        )
+        cause, effect = args[0]
+        window_counts = self.window_engine.sufficiency(cause, effect)
+        return self._by_window(window_counts, cause, effect)
 
     def _init_D(self):
         """Initialize a dictionary to save Dw(x)."""
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_D,
-                [
-                    (cause, window_size)
-                    for window_size in self.window_sizes
-                    for cause in self.cause_set
-                ],
-            )
+        results = self.executor.map(
+            "_calc_D", self._pending("D", [cause for cause in self.cause_set])
+        )
 
-        self.D.update({result[0]: result[1] for result in results})
+        self.D.update({key: value for result in results for key, value in result})
 
-    def _calc_D(self, *args):
+    def _calc_D(self, cause):
         """
-        Compute:
+        Compute, for every window size at once:
             Dw(x): Count the number of windows in which x occurs.
-
-        Params:
-            args[0] = (cause, window_size)
         """
-        cause, window_size = args[0]
-        windows_count = 0
-
-        for i in range(self.T - window_size + 1):
-            current_window = self.cause_col[i : i + window_size]
+        windows_count = self.window_engine.D(cause)
+        return self._by_window(windows_count, cause)
 
-            if current_window.apply(self._exist, args=(cause,)).any():
-                windows_count += 1
-        return (window_size, cause), windows_count
+    def _by_window(self, values, *events):
+        """Expand a {window_size: value} result into ((window_size, *events), value) items."""
+        return [
+            ((window_size, *events), values[window_size])
+            for window_size in self.window_sizes
+        ]
 
     def _init_N(self):
         """Initialize a dictionary to save N(x)."""
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_N,
+        results = self.executor.map(
+            "_calc_N",
+            self._pending(
+                "N",
                 [event for event in self.cause_set.union(self.effect_set)],
-            )
+                lambda event: [event],
+            ),
+        )
         self.N.update({result[0]: result[1] for result in results})
 
     def _calc_N(self, event):
         """
         Compute:
             N(x): Count the number of occurrences of x in the entire dataset.
+            x is looked up in the cause column if it ever occurs there, else in the effect column.
         """
-        if self.cause_col.apply(self._exist, args=(event,)).any():
-            event_col = self.cause_col
-        else:
-            event_col = self.effect_col
-
-        return event, event_col.apply(self._exist, args=(event,)).sum()
+        return event, self.event_index.count(event)
 
     def _init_p(self):
         """Initialize a dictionary to save p(x)."""
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                self._calc_p,
-                [event for event in self.cause_set.union(self.effect_set)],
-            )
-        self.p.update({result[0]: result[1] for result in results})
+        self.p.update(
+            self._calc_p(event) for event in self.cause_set.union(self.effect_set)
+        )
 
     def _calc_p(self, event):
         """
@@ -222,6 +936,100 @@ class DurationDataObject:
         """
         return event, self.N[event] / self.T
 
+    def _init_accumulated_cause_durations(self):
+        results = self.executor.map(
+            "_calc_accumulated_cause_durations",
+            self._pair_tasks("accumulated_cause_durations"),
+        )
+        self.accumulated_cause_durations.update(
+            {key: value for result in results for key, value in result}
+        )
+
+    def _calc_accumulated_cause_durations(self, *args):
+        """
+        Considering (x <- y).
+        If y occurs and x occurred in the previous window, accumulate the durations of all x in that window.
+        """
+        cause, effect = args[0]
+        sum_duration = self.window_engine.accumulated_cause_durations(cause, effect)
+        return self._by_window(sum_duration, cause, effect)
+
+    def _init_accumulated_effect_durations(self):
+        results = self.executor.map(
+            "_calc_accumulated_effect_durations",
+            self._pair_tasks("accumulated_effect_durations"),
+        )
+        self.accumulated_effect_durations.update(
+            {key: value for result in results for key, value in result}
+        )
+
+    def _calc_accumulated_effect_durations(self, *args):
+        """
+        Considering (x -> y).
+        If x occurs and y occurs in the next window, accumulate durations of all y in the window.
+        """
+        cause, effect = args[0]
+        sum_duration = self.window_engine.accumulated_effect_durations(cause, effect)
+        return self._by_window(sum_duration, cause, effect)
+
+    def _init_effect_durations_when_cause_comp(self):
+        results = self.executor.map(
+            "_calc_effect_durations_when_cause_comp",
+            self._pair_tasks(
+                "effect_durations_when_cause_comp",
+                self.window_engine.effect_durations_when_cause_comp,
+            ),
+        )
+        self.effect_durations_when_cause_comp.update(
+            {key: value for result in results for key, value in result}
+        )
+
+    def _calc_effect_durations_when_cause_comp(self, *args):
+        """
+                     _
+        Considering (x <- y).
+        If y occurs but x didn't occur in the previous window, accumulate the duration of y.
+        """
+        cause, effect = args[0]
+        sum_duration = self.window_engine.effect_durations_when_cause_comp(
+            cause, effect
+        )
+        return self._by_window(sum_duration, cause, effect)
+
+    def compute_pairs(self, names, pairs):
+        """
+        Compute the (window size, cause, effect) statistics names for the given
+        (cause, effect) pairs only, skipping the pairs already computed. The workers
+        started are kept until executor.close().
+        """
+        pairs = list(pairs)
+        for name in names:
+            if name not in self.__dict__:
+                setattr(self, name, self._new_statistic(name))
+            statistic = getattr(self, name)
+            tasks = [
+                pair for pair in pairs if (self.window_sizes[0], *pair) not in statistic
+            ]
+            results = self.executor.map(f"_calc_{name}", tasks)
+            statistic.update(item for result in results for item in result)
+
+    def pair_axes(self, causes=None, effects=None):
+        """Return the causes and effects scored by the matrix scores (default: sorted sets)."""
+        causes = sorted(self.cause_set) if causes is None else list(causes)
+        effects = sorted(self.effect_set) if effects is None else list(effects)
+        return causes, effects
+
+    def event_array(self, table, events):
+        """Return a per-event table (N, p, total durations) as a float array."""
+        return np.array([table[event] for event in events], dtype=np.float64)
+
+    def statistic_array(self, name, window_sizes, causes, effects):
+        """
+        Return a (window size, cause, effect) statistic as a float array of shape
+        (len(window_sizes), len(causes), len(effects)).
+        """
+        return getattr(self, name).array(window_sizes, causes, effects)
+
     def pw_backward(self, cause, effect, window_size):
         """
         Compute:
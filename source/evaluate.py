@@ -0,0 +1,70 @@
+import sys
+import datetime
+import argparse
+import pandas as pd
+
+from hits_at_k import evaluate, load_ground_truth
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compute Hits@K of the results written by DEC.py against a ground truth"
+    )
+    parser.add_argument(
+        "-I",
+        "--infile",
+        help="Paths to the results files",
+        required=True,
+        nargs="+",
+        dest="in_files",
+    )
+    parser.add_argument(
+        "-G",
+        "--ground-truth",
+        help="Path to the ground-truth file, or one path per results file",
+        required=True,
+        nargs="+",
+        dest="ground_truth_files",
+    )
+    parser.add_argument(
+        "-O",
+        "--outfile",
+        help="Path to the file to store Hits@K",
+        required=True,
+        nargs=1,
+        dest="out_file",
+    )
+    parser.add_argument(
+        "-K",
+        help="The values of K (default: 1 to the number of causes)",
+        required=False,
+        default=None,
+        nargs="+",
+        type=int,
+        dest="ks",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ground_truth_files = args.ground_truth_files
+    if len(ground_truth_files) == 1:
+        ground_truth_files = ground_truth_files * len(args.in_files)
+    elif len(ground_truth_files) != len(args.in_files):
+        print("[-] Please specify one ground-truth file, or one per results file.")
+        sys.exit(0)
+
+    print("[+] Computing Hits@K.", datetime.datetime.now())
+    ground_truths = {
+        path: load_ground_truth(path) for path in sorted(set(ground_truth_files))
+    }
+    tables = []
+    for in_file, ground_truth_file in zip(args.in_files, ground_truth_files):
+        table = evaluate(
+            pd.read_csv(in_file), ground_truths[ground_truth_file], args.ks
+        )
+        table.insert(0, "file", in_file)
+        tables.append(table)
+    pd.concat(tables, ignore_index=True).to_csv(args.out_file[0], index=False)
+    print("[+] Finished.", datetime.datetime.now())
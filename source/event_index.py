@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+CAUSE = "cause"
+EFFECT = "effect"
+
+
+class EventIndex:
+    """
+    Interned event vocabulary plus a per-event occurrence index over the T rows.
+
+    The comma-joined cause/effect strings are parsed exactly once. Every row is
+    stored as a list of event ids (CSR layout: indptr/ids per column) and every
+    event keeps the sorted row indices at which it occurs in each column.
+
+    The index is built from whole columns, or from consecutive chunks of rows passed
+    to add() followed by build(), so the strings of a chunk can be discarded as soon
+    as it is encoded.
+    """
+
+    def __init__(self, cause_col: pd.Series = None, effect_col: pd.Series = None):
+        self.vocabulary = dict()
+        self.events = []
+        self.T = 0
+        self._chunks = []
+        self._cause_events = None
+
+        if cause_col is not None:
+            self.add(cause_col, effect_col)
+            self.build()
+
+    def add(self, cause_col: pd.Series, effect_col: pd.Series):
+        """Encode the next chunk of rows."""
+        self._chunks.append(self.encode(cause_col, effect_col))
+
+    def encode(self, cause_col: pd.Series, effect_col: pd.Series):
+        """Encode a chunk of rows into CSR arrays ((indptr, ids) per column) without indexing it."""
+        return self._encode(cause_col), self._encode(effect_col)
+
+    def build(self, start: int = 0, stop: int = None):
+        """Index the rows added so far, keeping rows start to stop if given."""
+        cause_chunks = [cause for cause, _ in self._chunks]
+        effect_chunks = [effect for _, effect in self._chunks]
+        self._chunks = []
+
+        self.cause_indptr, self.cause_ids = self._concatenate(cause_chunks, start, stop)
+        self.effect_indptr, self.effect_ids = self._concatenate(
+            effect_chunks, start, stop
+        )
+        self.T = len(self.cause_indptr) - 1
+
+        self.cause_rows = self._occurrence_rows(self.cause_indptr, self.cause_ids)
+        self.effect_rows = self._occurrence_rows(self.effect_indptr, self.effect_ids)
+
+    @staticmethod
+    def _concatenate(chunks, start=0, stop=None):
+        """Concatenate the CSR arrays of consecutive chunks, sliced to rows start:stop."""
+        indptrs, ids, offset = [np.zeros(1, dtype=np.int64)], [], 0
+        for chunk_indptr, chunk_ids in chunks:
+            indptrs.append(chunk_indptr[1:] + offset)
+            ids.append(chunk_ids)
+            offset += chunk_indptr[-1]
+        indptr = np.concatenate(indptrs)
+        ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        if start > 0 or (stop is not None and stop < len(indptr) - 1):
+            indptr = indptr[start : (stop + 1 if stop is not None else None)]
+            ids = ids[indptr[0] : indptr[-1]]
+            indptr = indptr - indptr[0]
+        return indptr, ids
+
+    @staticmethod
+    def slice_rows(chunk, start=0, stop=None):
+        """Return the rows start to stop of the CSR arrays (indptr, ids) of a column."""
+        return EventIndex._concatenate([chunk], start, stop)
+
+    def intern(self, event: str) -> int:
+        """Return the id of an event, adding it to the vocabulary if needed."""
+        event_id = self.vocabulary.get(event)
+        if event_id is None:
+            event_id = len(self.events)
+            self.vocabulary[event] = event_id
+            self.events.append(event)
+        return event_id
+
+    def _encode(self, col: pd.Series):
+        """
+        Encode a column of comma-joined event sets into CSR arrays.
+        Each distinct string is split only once; duplicated events within a row are dropped
+        and missing (non-string) cells hold no events.
+        """
+        codes, uniques = pd.factorize(col)
+        unique_ids = []
+        for items in uniques:
+            events = dict.fromkeys(items.split(", ") if isinstance(items, str) else ())
+            events.pop("", None)
+            unique_ids.append([self.intern(event) for event in events])
+        # Missing cells are coded -1: they index this last, empty entry.
+        unique_ids.append([])
+
+        unique_lengths = np.array([len(ids) for ids in unique_ids], dtype=np.int64)
+        unique_indptr = np.zeros(len(unique_ids) + 1, dtype=np.int64)
+        np.cumsum(unique_lengths, out=unique_indptr[1:])
+        unique_flat = np.fromiter(
+            (event_id for ids in unique_ids for event_id in ids),
+            dtype=np.int64,
+            count=int(unique_indptr[-1]),
+        )
+
+        lengths = unique_lengths[codes]
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        offsets = np.arange(indptr[-1], dtype=np.int64) - np.repeat(
+            indptr[:-1], lengths
+        )
+        ids = unique_flat[np.repeat(unique_indptr[codes], lengths) + offsets]
+        return indptr, ids
+
+    def _occurrence_rows(self, indptr, ids, event_indptr=None, event_rows=None):
+        """
+        Group the CSR arrays by event id into sorted row-index arrays, or slice them out
+        of event_indptr/event_rows, the grouped rows of every event id as CSR arrays.
+        """
+        if event_indptr is None:
+            event_indptr, event_rows = self.occurrence_arrays(indptr, ids)
+        return {
+            event: event_rows[event_indptr[event_id] : event_indptr[event_id + 1]]
+            for event_id, event in enumerate(self.events)
+        }
+
+    def occurrence_arrays(self, indptr, ids):
+        """Return the sorted occurrence rows of every event id as CSR arrays (indptr, rows)."""
+        rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+        order = np.argsort(ids, kind="stable")
+        counts = np.bincount(ids, minlength=len(self.events))
+        event_indptr = np.zeros(len(self.events) + 1, dtype=np.int64)
+        np.cumsum(counts, out=event_indptr[1:])
+        return event_indptr, rows[order]
+
+    @classmethod
+    def from_arrays(
+        cls, events: list, cause: dict, effect: dict, start: int = 0, stop: int = None
+    ):
+        """
+        Build an index from encoded arrays, e.g. memory-mapped ones. cause and effect hold
+        the CSR arrays of the rows (indptr, ids) and of the occurrence rows of every event
+        (event_indptr, event_rows), which are sliced without copying. With start or stop,
+        only rows start to stop are indexed and the occurrence rows are recomputed.
+        """
+        index = cls()
+        for event in events:
+            index.intern(event)
+        if start > 0 or (stop is not None and stop < len(cause["indptr"]) - 1):
+            index._chunks = [
+                ((cause["indptr"], cause["ids"]), (effect["indptr"], effect["ids"]))
+            ]
+            index.build(start, stop)
+            return index
+
+        index.cause_indptr, index.cause_ids = cause["indptr"], cause["ids"]
+        index.effect_indptr, index.effect_ids = effect["indptr"], effect["ids"]
+        index.T = len(index.cause_indptr) - 1
+        index.cause_rows = index._occurrence_rows(
+            index.cause_indptr,
+            index.cause_ids,
+            cause["event_indptr"],
+            cause["event_rows"],
+        )
+        index.effect_rows = index._occurrence_rows(
+            index.effect_indptr,
+            index.effect_ids,
+            effect["event_indptr"],
+            effect["event_rows"],
+        )
+        return index
+
+    @classmethod
+    def from_chunks(
+        cls,
+        events: list,
+        chunks: list,
+        start: int = 0,
+        stop: int = None,
+        cause_events: set = None,
+    ):
+        """
+        Build an index over rows start to stop of encoded chunks of rows (as returned by
+        encode()), with the vocabulary events. With cause_events, column_of() looks up
+        exactly these events in the cause column, e.g. to follow a larger dataset the rows
+        belong to.
+        """
+        index = cls()
+        for event in events:
+            index.intern(event)
+        index._chunks = list(chunks)
+        index.build(start, stop)
+        index._cause_events = cause_events
+        return index
+
+    def column_events(self, column: str) -> set:
+        """Return the set of events occurring at least once in a column."""
+        return {event for event, rows in self._rows_of(column).items() if len(rows) > 0}
+
+    def _rows_of(self, column):
+        return self.cause_rows if column == CAUSE else self.effect_rows
+
+    def column_of(self, event: str) -> str:
+        """Return the cause column if the event ever occurs there, else the effect column."""
+        if self._cause_events is not None:
+            return CAUSE if event in self._cause_events else EFFECT
+        if len(self.cause_rows.get(event, ())) > 0:
+            return CAUSE
+        return EFFECT
+
+    def rows(self, event: str, column: str = None) -> np.ndarray:
+        """Return the sorted row indices at which an event occurs in a column."""
+        if column is None:
+            column = self.column_of(event)
+        rows = self._rows_of(column).get(event)
+        if rows is None:
+            return np.empty(0, dtype=np.int64)
+        return rows
+
+    def rows_in(self, event: str, column: str, start: int, stop: int) -> np.ndarray:
+        """Return the rows in [start, stop) at which an event occurs in a column."""
+        rows = self.rows(event, column)
+        return rows[rows.searchsorted(start) : rows.searchsorted(stop)]
+
+    def any_in(self, event: str, column: str, start: int, stop: int) -> bool:
+        """Check whether an event occurs in a column within the rows [start, stop)."""
+        rows = self.rows(event, column)
+        position = rows.searchsorted(start)
+        return position < len(rows) and rows[position] < stop
+
+    def count(self, event: str, column: str = None) -> int:
+        """Count the rows at which an event occurs in a column."""
+        return len(self.rows(event, column))
@@ -0,0 +1,124 @@
+import os
+import time
+import multiprocessing as mp
+
+from concurrent.futures import ThreadPoolExecutor
+
+EXECUTIONS = ("auto", "serial", "thread", "process")
+
+# Below this many rows, "auto" execution runs serially: pool startup would dominate.
+SERIAL_MAX_ROWS = 5000
+
+# The data object served by the worker processes. Forked workers inherit it from the
+# parent, so the dataset is shared read-only instead of being pickled with every task.
+_worker_data_obj = None
+
+
+def available_cpus() -> int:
+    """Return the number of CPUs this process may run on (its affinity mask)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(data_obj):
+    global _worker_data_obj
+    _worker_data_obj = data_obj
+
+
+def _run_chunk(chunk):
+    return _worker_data_obj._run_tasks(*chunk)
+
+
+class Executor:
+    """
+    One executor per data object construction; its workers start lazily on the first map.
+
+    execution is "serial" (in-process, no pool), "thread", "process" or "auto", which
+    runs serially with a single job or fewer than SERIAL_MAX_ROWS rows and uses processes
+    otherwise. jobs defaults to the CPUs in the affinity mask of the process.
+
+    Tasks are sent in chunks of consecutive tasks (consecutive tasks share their cause,
+    so a worker reuses its per-cause arrays across the chunk). Results come back in
+    task order.
+    """
+
+    def __init__(
+        self,
+        data_obj,
+        jobs: int = None,
+        execution: str = "auto",
+        chunks_per_worker: int = 4,
+    ):
+        if execution not in EXECUTIONS:
+            raise ValueError(
+                f"Unknown execution {execution!r}, expected one of {list(EXECUTIONS)}."
+            )
+        self.data_obj = data_obj
+        self.jobs = max(1, jobs or available_cpus())
+        if execution == "auto":
+            if self.jobs == 1 or data_obj.T < SERIAL_MAX_ROWS:
+                execution = "serial"
+            else:
+                execution = "process"
+        self.execution = execution
+        self.chunks_per_worker = chunks_per_worker
+        self._pool = None
+
+    def _start(self):
+        global _worker_data_obj
+        if self.execution == "thread":
+            self._pool = ThreadPoolExecutor(self.jobs)
+        elif "fork" in mp.get_all_start_methods():
+            _worker_data_obj = self.data_obj
+            self._pool = mp.get_context("fork").Pool(self.jobs)
+        else:
+            self._pool = mp.Pool(
+                self.jobs, initializer=_init_worker, initargs=(self.data_obj,)
+            )
+            self.data_obj.profiler.count_pickled(self.data_obj, copies=self.jobs)
+
+    def map(self, method_name: str, tasks: list) -> list:
+        """Run data_obj.<method_name>(task) for every task."""
+        if not tasks:
+            return []
+        profiler = self.data_obj.profiler
+        profiler.count_tasks(len(tasks))
+        if self.execution == "serial":
+            return self.data_obj._run_tasks(
+                method_name, self.data_obj.window_sizes, tasks
+            )
+        if self._pool is None:
+            start = time.perf_counter()
+            self._start()
+            profiler.count_pool_startup(time.perf_counter() - start)
+
+        chunk_size = -(-len(tasks) // (self.jobs * self.chunks_per_worker))
+        chunks = [
+            (method_name, self.data_obj.window_sizes, tasks[i : i + chunk_size])
+            for i in range(0, len(tasks), chunk_size)
+        ]
+        if self.execution == "thread":
+            chunk_results = self._pool.map(
+                lambda chunk: self.data_obj._run_tasks(*chunk), chunks
+            )
+        else:
+            chunk_results = self._pool.map(_run_chunk, chunks)
+            if profiler.enabled:
+                # Pickled again to measure them: only when profiling.
+                profiler.count_pickled(chunks, chunk_results)
+        return [result for results in chunk_results for result in results]
+
+    def close(self):
+        global _worker_data_obj
+        if self._pool is None:
+            return
+        if self.execution == "thread":
+            self._pool.shutdown()
+        else:
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+        # Let the data object go once its construction is done.
+        if _worker_data_obj is self.data_obj:
+            _worker_data_obj = None
@@ -0,0 +1,146 @@
+import os
+import sys
+import datetime
+import argparse
+
+from synthetic import write_dataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic duration dataset with planted causes"
+    )
+    parser.add_argument(
+        "-O",
+        "--outfile",
+        help="Path to the duration data file to write",
+        required=True,
+        nargs=1,
+        dest="out_file",
+    )
+    parser.add_argument(
+        "--ground-truth",
+        help="Path to the ground-truth file to write (default: next to the data file)",
+        required=False,
+        default=None,
+        dest="ground_truth_file",
+    )
+    parser.add_argument(
+        "--parent",
+        help="Path to the parent file to write (default: next to the data file)",
+        required=False,
+        default=None,
+        dest="parent_file",
+    )
+    parser.add_argument(
+        "-T", "--rows", help="Number of rows", required=True, type=int, dest="n_rows"
+    )
+    parser.add_argument(
+        "--causes",
+        help="Number of cause events",
+        required=False,
+        default=26,
+        type=int,
+        dest="n_causes",
+    )
+    parser.add_argument(
+        "--effects",
+        help="Number of effect events",
+        required=False,
+        default=26,
+        type=int,
+        dest="n_effects",
+    )
+    parser.add_argument(
+        "--events-per-row",
+        help="Number of cause events of every row",
+        required=False,
+        default=1,
+        type=int,
+        dest="events_per_row",
+    )
+    parser.add_argument(
+        "--causes-per-effect",
+        help="Number of true causes of every effect",
+        required=False,
+        default=1,
+        type=int,
+        dest="causes_per_effect",
+    )
+    parser.add_argument(
+        "--lag",
+        help="Rows between a cause and the effect it triggers: fixed:V, uniform:A:B or "
+        "geometric:MEAN (default: uniform:0:5)",
+        required=False,
+        default="uniform:0:5",
+    )
+    parser.add_argument(
+        "--duration-distribution",
+        help="Duration of every row: fixed:V, uniform:A:B or geometric:MEAN "
+        "(default: geometric:5)",
+        required=False,
+        default="geometric:5",
+        dest="duration",
+    )
+    parser.add_argument(
+        "--strength",
+        help="Probability that a true cause triggers its effect (default: 0.8)",
+        required=False,
+        default=0.8,
+        type=float,
+    )
+    parser.add_argument(
+        "--noise",
+        help="Probability that a row gets a random effect (default: 0.1)",
+        required=False,
+        default=0.1,
+        type=float,
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Generate and write the rows in chunks of this many rows",
+        required=False,
+        default=1000000,
+        type=int,
+        dest="chunk_size",
+    )
+    parser.add_argument(
+        "--seed", help="Seed of the generator", required=False, default=0, type=int
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    out_file = args.out_file[0]
+    stem = os.path.splitext(out_file)[0]
+    if args.n_rows < 1 or args.chunk_size < 1:
+        print("[-] --rows and --chunk-size take positive numbers.")
+        sys.exit(0)
+
+    out_dir = os.path.dirname(out_file)
+    if out_dir and not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    print("[+] Generating the dataset.", datetime.datetime.now())
+    try:
+        write_dataset(
+            out_file,
+            args.ground_truth_file or f"{stem}_ground_truth.csv",
+            args.parent_file or f"{stem}_parent.json",
+            args.n_rows,
+            args.n_causes,
+            args.n_effects,
+            args.causes_per_effect,
+            args.seed,
+            events_per_row=args.events_per_row,
+            lag=args.lag,
+            duration=args.duration,
+            strength=args.strength,
+            noise=args.noise,
+            chunk_size=args.chunk_size,
+        )
+    except ValueError as error:
+        print(f"[-] {error}")
+        sys.exit(0)
+    print("[+] Finished.", datetime.datetime.now())
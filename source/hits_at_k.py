@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# The score columns written by DEC.py, in order.
+SCORE_COLUMNS = (
+    "nst",
+    "cirb",
+    "circ",
+    "cirm 1 (avg)",
+    "cirm 1 (max)",
+    "cirm 2 (avg)",
+    "cirm 2 (max)",
+)
+
+
+def load_ground_truth(path: str) -> pd.DataFrame:
+    """Read the (cause, effect) pairs of a ground-truth file."""
+    return pd.read_csv(path, usecols=["cause", "effect"])
+
+
+def score_tensor(results: pd.DataFrame, score: str):
+    """
+    Turn a score column of a results table (one row per window size, cause and effect,
+    as written by DEC.py) into an array of shape (window size, cause, effect). Returns
+    the window sizes, causes and effects (sorted) and the array; missing rows are NaN.
+    """
+    window_codes, window_sizes = pd.factorize(results["window size"], sort=True)
+    cause_codes, causes = pd.factorize(results["cause"], sort=True)
+    effect_codes, effects = pd.factorize(results["effect"], sort=True)
+    scores = np.full((len(window_sizes), len(causes), len(effects)), np.nan)
+    scores[window_codes, cause_codes, effect_codes] = results[score].to_numpy(
+        dtype=np.float64
+    )
+    return list(window_sizes), list(causes), list(effects), scores
+
+
+def hits_at_k(
+    scores: np.ndarray,
+    causes: list,
+    effects: list,
+    ground_truth: pd.DataFrame,
+    ks=None,
+) -> np.ndarray:
+    """
+    Compute Hits@K of an array of scores of shape (..., cause, effect), e.g.
+    (window size, cause, effect), for every K in ks (default: 1 to the number of causes).
+
+    Every effect ranks its causes by decreasing score, ties broken by the order of the
+    causes; missing (NaN) scores rank last. With hits(y) the true causes of an effect y
+    ranked in its top K:
+
+                    sum_y hits(y)
+        Hits@K = ---------------------------
+                  sum_y min(K, true causes(y))
+
+    over the effects of the ground truth, so a perfect ranking scores 1 for every K.
+    A true cause or effect missing from the scores is never hit. Returns an array of
+    shape (..., len(ks)).
+    """
+    scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+    ks = np.arange(1, len(causes) + 1) if ks is None else np.asarray(ks)
+    cause_ids = {cause: i for i, cause in enumerate(causes)}
+    effect_ids = {effect: i for i, effect in enumerate(effects)}
+
+    pairs = ground_truth[["cause", "effect"]].drop_duplicates()
+    true_causes = pairs.groupby("effect").size().to_numpy()
+    denominator = np.minimum(ks[:, None], true_causes).sum(axis=1)
+
+    known = pairs["cause"].isin(cause_ids) & pairs["effect"].isin(effect_ids)
+    cause_index = pairs["cause"][known].map(cause_ids).to_numpy(dtype=np.int64)
+    effect_index = pairs["effect"][known].map(effect_ids).to_numpy(dtype=np.int64)
+
+    # The rank of every true pair among the causes of its effect: the causes scoring
+    # higher, or as high and ordered before it, plus one.
+    true_scores = scores[..., cause_index, effect_index][..., None, :]
+    columns = scores[..., :, effect_index]
+    before = np.arange(len(causes))[:, None] < cause_index
+    ranks = 1 + ((columns > true_scores) | ((columns == true_scores) & before)).sum(
+        axis=-2
+    )
+
+    hits = (ranks[..., None, :] <= ks[:, None]).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, hits / denominator, 0.0)
+
+
+def evaluate(results: pd.DataFrame, ground_truth: pd.DataFrame, ks=None):
+    """
+    Compute Hits@K of every score column of a results table, for every window size and
+    every K (default: 1 to the number of causes). Returns a table with one row per
+    score, window size and K.
+    """
+    tables = []
+    for score in [column for column in SCORE_COLUMNS if column in results]:
+        window_sizes, causes, effects, scores = score_tensor(results, score)
+        score_ks = np.arange(1, len(causes) + 1) if ks is None else np.asarray(ks)
+        hits = hits_at_k(scores, causes, effects, ground_truth, score_ks)
+        tables.append(
+            pd.DataFrame(
+                {
+                    "score": score,
+                    "window size": np.repeat(window_sizes, len(score_ks)),
+                    "K": np.tile(score_ks, len(window_sizes)),
+                    "hits@K": hits.ravel(),
+                }
+            )
+        )
+    if not tables:
+        return pd.DataFrame(columns=["score", "window size", "K", "hits@K"])
+    return pd.concat(tables, ignore_index=True)
@@ -1,3 +1,5 @@
+import numpy as np
+
 from nst_duration_data_object import NSTDurationDataObject
 
 
@@ -28,12 +30,8 @@ def nst(
     sum_duration_in_window_y = data_obj.accumulated_effect_durations[
         (window_size, cause, effect)
     ]
-    total_duration_x = data_obj.duration_col[
-        data_obj.cause_col.apply(data_obj._exist, args=(cause,))
-    ].sum()
-    total_duration_y = data_obj.duration_col[
-        data_obj.effect_col.apply(data_obj._exist, args=(effect,))
-    ].sum()
+    total_duration_x = data_obj.cause_total_duration[cause]
+    total_duration_y = data_obj.effect_total_duration[effect]
 
     if px == 0 or py == 0 or total_duration_x == 0 or total_duration_y == 0:
         return 0
@@ -45,3 +43,126 @@ def nst(
         px * py ** alpha_const * total_duration_y
     )
     return left_term ** lambda_const * right_term ** (1 - lambda_const)
+
+
+def nst_matrix(
+    data_obj: NSTDurationDataObject,
+    window_sizes: list,
+    lambda_const: float,
+    alpha_const: float,
+    causes: list = None,
+    effects: list = None,
+) -> np.ndarray:
+    """
+    Compute NST(x, y) for every window size, cause and effect at once.
+
+    Returns an array of shape (window size, cause, effect), the causes and effects in
+    the order of data_obj.pair_axes(causes, effects).
+    """
+    return nst_sweep(
+        data_obj, window_sizes, [lambda_const], [alpha_const], causes, effects
+    )[0, 0]
+
+
+def nst_sweep(
+    data_obj: NSTDurationDataObject,
+    window_sizes: list,
+    lambda_consts: list,
+    alpha_consts: list,
+    causes: list = None,
+    effects: list = None,
+) -> np.ndarray:
+    """
+    Compute NST(x, y) for every lambda_const, alpha_const, window size, cause and
+    effect at once, reading the statistics once.
+
+    Returns an array of shape (lambda_const, alpha_const, window size, cause, effect),
+    the causes and effects in the order of data_obj.pair_axes(causes, effects).
+    """
+    return nst_grid(
+        _nst_statistics(data_obj, window_sizes, causes, effects),
+        lambda_consts,
+        alpha_consts,
+    )
+
+
+def nst_grid(statistics: tuple, lambda_consts: list, alpha_consts: list) -> np.ndarray:
+    """
+    Compute NST from its statistics as arrays, as returned by _nst_statistics(), for
+    every lambda_const and alpha_const.
+
+    Returns an array of shape (lambda_const, alpha_const) + the broadcast shape of the
+    statistics.
+    """
+    (
+        pw_backward,
+        pw_forward,
+        px,
+        py,
+        sum_duration_in_window_x,
+        sum_duration_in_window_y,
+        total_duration_x,
+        total_duration_y,
+    ) = statistics
+    defined = (px != 0) & (py != 0) & (total_duration_x != 0) & (total_duration_y != 0)
+    scores = np.zeros(
+        (len(lambda_consts), len(alpha_consts)) + np.broadcast(*statistics).shape
+    )
+    # One whole-array pass per grid point, with the exponents as scalars so that
+    # every point is bit-identical to a single (lambda_const, alpha_const).
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j, alpha_const in enumerate(alpha_consts):
+            left_term = (pw_backward * sum_duration_in_window_x) / (
+                px ** alpha_const * py * total_duration_x
+            )
+            right_term = (pw_forward * sum_duration_in_window_y) / (
+                px * py ** alpha_const * total_duration_y
+            )
+            for i, lambda_const in enumerate(lambda_consts):
+                scores[i, j] = np.where(
+                    defined,
+                    left_term ** lambda_const * right_term ** (1 - lambda_const),
+                    0.0,
+                )
+    return scores
+
+
+def _nst_statistics(data_obj, window_sizes, causes, effects):
+    """
+    Read the statistics of NST as arrays broadcasting to (window size, cause, effect):
+    pw(x <- y), pw(x -> y), p(x), p(y), the durations in window of x and of y and the
+    total durations of x and of y.
+    """
+    causes, effects = data_obj.pair_axes(causes, effects)
+    pw_backward = (
+        data_obj.statistic_array("necessity", window_sizes, causes, effects)
+        / data_obj.T
+    )
+    pw_forward = (
+        data_obj.statistic_array("sufficiency", window_sizes, causes, effects)
+        / data_obj.T
+    )
+    px = data_obj.event_array(data_obj.p, causes)[:, None]
+    py = data_obj.event_array(data_obj.p, effects)[None, :]
+    sum_duration_in_window_x = data_obj.statistic_array(
+        "accumulated_cause_durations", window_sizes, causes, effects
+    )
+    sum_duration_in_window_y = data_obj.statistic_array(
+        "accumulated_effect_durations", window_sizes, causes, effects
+    )
+    total_duration_x = data_obj.event_array(data_obj.cause_total_duration, causes)[
+        :, None
+    ]
+    total_duration_y = data_obj.event_array(data_obj.effect_total_duration, effects)[
+        None, :
+    ]
+    return (
+        pw_backward,
+        pw_forward,
+        px,
+        py,
+        sum_duration_in_window_x,
+        sum_duration_in_window_y,
+        total_duration_x,
+        total_duration_y,
+    )
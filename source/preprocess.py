@@ -0,0 +1,68 @@
+import datetime
+import argparse
+
+from preprocessing import preprocess
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Collapse a raw dataset (one row per timestep) into a duration dataset"
+    )
+    parser.add_argument(
+        "-I",
+        "--infile",
+        help="Path to the raw data file",
+        required=True,
+        nargs=1,
+        dest="in_file",
+    )
+    parser.add_argument(
+        "-O",
+        "--outfile",
+        help="Path to the duration data file to write",
+        required=True,
+        nargs=1,
+        dest="out_file",
+    )
+    parser.add_argument(
+        "--cause",
+        help="The name of the cause column",
+        required=True,
+        dest="cause_col_name",
+    )
+    parser.add_argument(
+        "--effect",
+        help="The name of the effect column",
+        required=True,
+        dest="effect_col_name",
+    )
+    parser.add_argument(
+        "--duration",
+        help="The name of the duration column to write",
+        required=False,
+        default="duration",
+        dest="duration_col_name",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Read the raw data file in chunks of this many rows",
+        required=False,
+        default=100000,
+        type=int,
+        dest="chunk_size",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("[+] Preprocessing the dataset.", datetime.datetime.now())
+    preprocess(
+        args.in_file[0],
+        args.out_file[0],
+        args.cause_col_name,
+        args.effect_col_name,
+        args.duration_col_name,
+        args.chunk_size,
+    )
+    print("[+] Finished.", datetime.datetime.now())
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+
+def collapse_runs(
+    cause: np.ndarray,
+    effect: np.ndarray,
+    offset: int = 0,
+    cause_col_name: str = "cause",
+    effect_col_name: str = "effect",
+    duration_col_name: str = "duration",
+) -> pd.DataFrame:
+    """
+    Run-length encode per-timestep (cause, effect) states: every run of consecutive
+    rows with the same cause and effect becomes one duration row, with the timesteps
+    (row numbers + offset) of its first and last row as start and end and its length
+    as duration.
+    """
+    change = np.ones(len(cause), dtype=bool)
+    change[1:] = (cause[1:] != cause[:-1]) | (effect[1:] != effect[:-1])
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], len(cause)) - 1
+    return pd.DataFrame(
+        {
+            cause_col_name: cause[starts],
+            effect_col_name: effect[starts],
+            "start": starts + offset,
+            "end": ends + offset,
+            duration_col_name: ends - starts + 1,
+        }
+    )
+
+
+def duration_chunks(
+    raw_path: str,
+    cause_col_name: str,
+    effect_col_name: str,
+    duration_col_name: str = "duration",
+    chunk_size: int = 100000,
+):
+    """
+    Read a raw dataset (one row of cause and effect events per timestep) in chunks of
+    chunk_size rows and yield its duration rows chunk by chunk. The last run of a chunk
+    is held back until the next chunk shows whether it continues. Missing cells are read
+    as no events.
+
+    The chunks can be written out (preprocess) or passed straight to a data object in
+    place of the path of a duration dataset.
+    """
+    pending, offset = None, 0
+    for chunk in pd.read_csv(
+        raw_path, usecols=[cause_col_name, effect_col_name], chunksize=chunk_size
+    ):
+        runs = collapse_runs(
+            chunk[cause_col_name].fillna("").to_numpy(dtype=object),
+            chunk[effect_col_name].fillna("").to_numpy(dtype=object),
+            offset,
+            cause_col_name,
+            effect_col_name,
+            duration_col_name,
+        )
+        offset += len(chunk)
+        if len(runs) == 0:
+            continue
+
+        if pending is not None:
+            if (
+                runs.at[0, cause_col_name] == pending.at[0, cause_col_name]
+                and runs.at[0, effect_col_name] == pending.at[0, effect_col_name]
+            ):
+                runs.at[0, "start"] = pending.at[0, "start"]
+                runs.at[0, duration_col_name] += pending.at[0, duration_col_name]
+            else:
+                runs = pd.concat([pending, runs], ignore_index=True)
+        pending = runs.iloc[-1:].reset_index(drop=True)
+        if len(runs) > 1:
+            yield runs.iloc[:-1]
+
+    if pending is not None:
+        yield pending
+
+
+def preprocess(
+    raw_path: str,
+    out_path: str,
+    cause_col_name: str,
+    effect_col_name: str,
+    duration_col_name: str = "duration",
+    chunk_size: int = 100000,
+):
+    """Write the duration dataset of a raw dataset as a CSV, chunk by chunk."""
+    header = True
+    for runs in duration_chunks(
+        raw_path, cause_col_name, effect_col_name, duration_col_name, chunk_size
+    ):
+        runs.to_csv(out_path, mode="w" if header else "a", header=header, index=False)
+        header = False
@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import pickle
+import cProfile
+
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the peak RSS is then not recorded.
+    resource = None
+
+
+def peak_rss_bytes(who=None):
+    """Return the peak resident set size of this process (or of its waited-for children)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS.
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+class Profiler:
+    """
+    Records, for every phase of a run (reading the dataset, each _init_<statistic>, the
+    scoring...), its wall and CPU time, the tasks sent to the executor, the bytes
+    pickled to and from the workers, the pool startup time and the peak RSS so far.
+
+    Phases do not nest: a phase opened inside another is merged into it. With
+    profile_dir, every phase also runs under cProfile and its stats are dumped to
+    profile_dir/<index>-<name>.prof (readable with pstats or snakeviz).
+    """
+
+    enabled = True
+
+    def __init__(self, profile_dir: str = None):
+        self.profile_dir = profile_dir
+        if profile_dir and not os.path.isdir(profile_dir):
+            os.makedirs(profile_dir)
+        self.phases = []
+        self._current = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        if self._current is not None:
+            yield self._current
+            return
+        record = dict(
+            name=name,
+            wall_seconds=0.0,
+            cpu_seconds=0.0,
+            worker_cpu_seconds=0.0,
+            tasks=0,
+            bytes_to_workers=0,
+            bytes_from_workers=0,
+            pool_startup_seconds=0.0,
+        )
+        profile = cProfile.Profile() if self.profile_dir else None
+        self._current = record
+        times, cpu, wall = os.times(), time.process_time(), time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            end_times = os.times()
+            record["wall_seconds"] = time.perf_counter() - wall
+            record["cpu_seconds"] = time.process_time() - cpu
+            # Only counts the workers joined by the end of the phase.
+            record["worker_cpu_seconds"] = (
+                end_times.children_user
+                + end_times.children_system
+                - times.children_user
+                - times.children_system
+            )
+            record["peak_rss_bytes"] = peak_rss_bytes()
+            self._current = None
+            self.phases.append(record)
+            if profile is not None:
+                profile.dump_stats(
+                    os.path.join(
+                        self.profile_dir, f"{len(self.phases):02d}-{name}.prof"
+                    )
+                )
+
+    def count_tasks(self, n_tasks: int):
+        if self._current is not None:
+            self._current["tasks"] += n_tasks
+
+    def count_pickled(self, to_workers=None, from_workers=None, copies=1):
+        """
+        Add the pickled size of the objects sent to (copies times) and received from
+        the workers.
+        """
+        if self._current is None:
+            return
+        if to_workers is not None:
+            self._current["bytes_to_workers"] += copies * len(pickle.dumps(to_workers))
+        if from_workers is not None:
+            self._current["bytes_from_workers"] += len(pickle.dumps(from_workers))
+
+    def count_pool_startup(self, seconds: float):
+        if self._current is not None:
+            self._current["pool_startup_seconds"] += seconds
+
+    def report(self) -> dict:
+        """Return the phases and their totals."""
+        total = {
+            key: sum(phase[key] for phase in self.phases)
+            for key in (
+                "wall_seconds",
+                "cpu_seconds",
+                "worker_cpu_seconds",
+                "tasks",
+                "bytes_to_workers",
+                "bytes_from_workers",
+                "pool_startup_seconds",
+            )
+        }
+        total["elapsed_seconds"] = time.perf_counter() - self._start
+        total["peak_rss_bytes"] = peak_rss_bytes()
+        if resource is not None:
+            total["peak_worker_rss_bytes"] = peak_rss_bytes(resource.RUSAGE_CHILDREN)
+        return dict(phases=self.phases, total=total)
+
+    def write(self, path: str, **extra):
+        """Write the report (and the extra fields, e.g. the command line) as JSON."""
+        with open(path, "w") as f:
+            json.dump(dict(extra, **self.report()), f, indent=2)
+
+
+class NullProfiler:
+    """The profiler of a data object when profiling is disabled: every call is a no-op."""
+
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name: str):
+        return self._phase
+
+    def count_tasks(self, n_tasks: int):
+        pass
+
+    def count_pickled(self, to_workers=None, from_workers=None, copies=1):
+        pass
+
+    def count_pool_startup(self, seconds: float):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,270 @@
+import numpy as np
+
+from collections.abc import Mapping, MutableMapping
+
+
+class StatisticArray(MutableMapping):
+    """
+    A windowed statistic, keyed like the dict it replaces: (window size, cause, effect),
+    (window size, cause) for D and (window size, cause, effect, z) for the CIRM ones,
+    where z is an event or a combination of events.
+
+    The values are kept in a dense float64 array with one axis per key part, window
+    sizes and causes indexed through their own label -> index vocabularies, and the
+    rest of the key (effect, or effect and z) through a third one, so a z only takes a
+    column for the effects it is a parent of. A boolean array marks the keys that are
+    set. A key costs 9 bytes instead of the tuple, float and hash slot of a dict entry
+    (over a hundred bytes), and array() reads a whole block of keys at once. The axes
+    grow by doubling as keys with new labels are set one at a time, and to fit by
+    update(). drop() frees the labels of the events gone from the dataset, and new
+    labels take their slots, so the arrays stay as large as the most labels held at once.
+    """
+
+    def __init__(self, key_length: int):
+        self.key_length = key_length
+        n_axes = min(key_length, 3)
+        self.labels = [dict() for _ in range(n_axes)]
+        # The slots of every axis freed by drop(), reused by new labels.
+        self.free = [[] for _ in range(n_axes)]
+        self.values = np.zeros((0,) * n_axes, dtype=np.float64)
+        self.present = np.zeros((0,) * n_axes, dtype=bool)
+
+    def _split(self, key):
+        if self.key_length <= 3:
+            return key
+        return key[0], key[1], key[2:]
+
+    def _join(self, parts):
+        if self.key_length <= 3:
+            return parts
+        return (parts[0], parts[1], *parts[2])
+
+    def _find(self, key):
+        """Return the array index of a key, or None if a label of it was never set."""
+        if len(key) != self.key_length:
+            return None
+        index = []
+        for labels, label in zip(self.labels, self._split(key)):
+            i = labels.get(label)
+            if i is None:
+                return None
+            index.append(i)
+        return tuple(index)
+
+    def _label(self, axis, label):
+        """Return the slot of a label on an axis, adding it to a free slot or a new one."""
+        labels = self.labels[axis]
+        i = labels.get(label)
+        if i is None:
+            free = self.free[axis]
+            i = labels[label] = free.pop() if free else len(labels)
+        return i
+
+    def _add(self, key, grow=True):
+        """
+        Return the array index of a key, adding its new labels; the axes grow by doubling,
+        or not at all without grow (see _fit).
+        """
+        index = []
+        for axis, label in enumerate(self._split(key)):
+            i = self._label(axis, label)
+            if grow and i == self.values.shape[axis]:
+                self._resize(axis, max(4, 2 * i))
+            index.append(i)
+        return tuple(index)
+
+    def _fit(self):
+        """Grow the axes to exactly their number of slots, if they are smaller."""
+        for axis, (labels, free) in enumerate(zip(self.labels, self.free)):
+            if len(labels) + len(free) > self.values.shape[axis]:
+                self._resize(axis, len(labels) + len(free))
+
+    def _resize(self, axis, size):
+        shape = list(self.values.shape)
+        pad = [(0, 0)] * len(shape)
+        pad[axis] = (0, size - shape[axis])
+        self.values = np.pad(self.values, pad)
+        self.present = np.pad(self.present, pad)
+
+    def __getitem__(self, key):
+        index = self._find(key)
+        if index is None or not self.present[index]:
+            raise KeyError(key)
+        return self.values[index]
+
+    def __setitem__(self, key, value):
+        index = self._add(key)
+        self.values[index] = value
+        self.present[index] = True
+
+    def __delitem__(self, key):
+        index = self._find(key)
+        if index is None or not self.present[index]:
+            raise KeyError(key)
+        self.present[index] = False
+
+    def __contains__(self, key):
+        index = self._find(key)
+        return index is not None and bool(self.present[index])
+
+    def __iter__(self):
+        axes = []
+        for labels, size in zip(self.labels, self.present.shape):
+            axis = [None] * size
+            for label, i in labels.items():
+                axis[i] = label
+            axes.append(axis)
+        for index in zip(*np.nonzero(self.present)):
+            yield self._join(tuple(axis[i] for axis, i in zip(axes, index)))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.present))
+
+    def update(self, other=()):
+        """Set many keys at once, with a single assignment into the arrays."""
+        items = other.items() if isinstance(other, Mapping) else other
+        index, values = [], []
+        for key, value in items:
+            index.append(self._add(key, grow=False))
+            values.append(value)
+        if not index:
+            return
+        self._fit()
+        index = tuple(np.array(index, dtype=np.intp).T)
+        self.values[index] = values
+        self.present[index] = True
+
+    def add(self, items):
+        """Add to many keys at once, with a single assignment; keys not set start from 0."""
+        index, values = [], []
+        for key, value in items:
+            index.append(self._add(key, grow=False))
+            values.append(value)
+        if not index:
+            return
+        self._fit()
+        index = tuple(np.array(index, dtype=np.intp).T)
+        self.values[index] = np.where(self.present[index], self.values[index], 0) + values
+        self.present[index] = True
+
+    def _across(self, axis, labels, items):
+        """
+        Return the array indices, of shape (len(items), len(labels)), of the keys of items
+        with each of labels on axis instead of their own label, and the values of items as
+        a column; None if there are none.
+        """
+        labels, items = list(labels), list(items)
+        if not labels or not items:
+            return None
+        parts = [self._split(key) for key, _ in items]
+        index = []
+        for i in range(self.present.ndim):
+            if i == axis:
+                slots = [self._label(i, label) for label in labels]
+                index.append(np.array(slots, dtype=np.intp)[None, :])
+            else:
+                slots = [self._label(i, part[i]) for part in parts]
+                index.append(np.array(slots, dtype=np.intp)[:, None])
+        self._fit()
+        values = np.array([value for _, value in items], dtype=np.float64)[:, None]
+        return tuple(np.broadcast_arrays(*index)), values
+
+    def add_across(self, axis, labels, items):
+        """
+        Add the value of every key of items to the keys with each of labels on axis
+        instead of its own, at once; keys not set start from 0.
+        """
+        across = self._across(axis, labels, items)
+        if across is None:
+            return
+        index, values = across
+        self.values[index] = np.where(self.present[index], self.values[index], 0) + values
+        self.present[index] = True
+
+    def setdefault_across(self, axis, labels, items):
+        """
+        Set the keys with each of labels on axis instead of the label of a key of items,
+        and not set yet, to the value of that key, at once.
+        """
+        across = self._across(axis, labels, items)
+        if across is None:
+            return
+        index, values = across
+        self.values[index] = np.where(self.present[index], self.values[index], values)
+        self.present[index] = True
+
+    def fill(self, axes, values):
+        """
+        Set every combination of the labels of axes (see array()) at once, to values
+        broadcast to the shape of the block, e.g. a scalar.
+        """
+        indices = [
+            np.array([self._label(i, label) for label in axis], dtype=np.intp)
+            for i, axis in enumerate(axes)
+        ]
+        self._fit()
+        block = np.ix_(*indices)
+        self.values[block] = values
+        self.present[block] = True
+
+    def drop(self, axis, labels):
+        """
+        Delete every key with one of labels on an axis, clearing their slices of the
+        arrays at once, and free the slots of the labels for new ones.
+        """
+        index = [
+            self.labels[axis].pop(label) for label in labels if label in self.labels[axis]
+        ]
+        if not index:
+            return
+        block = [slice(None)] * self.present.ndim
+        block[axis] = np.array(index, dtype=np.intp)
+        self.present[tuple(block)] = False
+        self.values[tuple(block)] = 0
+        self.free[axis].extend(index)
+
+    def drop_events(self, causes, effects):
+        """Delete every key of the causes, or of the effects, a slice of the arrays at a time."""
+        self.drop(1, causes)
+        if self.key_length > 2 and effects:
+            self.drop(
+                2,
+                [
+                    label
+                    for label in self.labels[2]
+                    if (label[0] if self.key_length > 3 else label) in effects
+                ],
+            )
+
+    def array(self, *axes):
+        """
+        Return the values of every combination of the labels of axes (window sizes,
+        causes and, if the key has them, the rest of the key: effects, or (effect, z)
+        pairs) as a float array of shape (len(axes[0]), len(axes[1]), ...).
+        """
+        indices = []
+        for labels, axis in zip(self.labels, axes):
+            index = [labels.get(label, -1) for label in axis]
+            if -1 in index:
+                missing = axis[index.index(-1)]
+                raise KeyError(missing)
+            indices.append(np.array(index, dtype=np.intp))
+        block = np.ix_(*indices)
+        if not self.present[block].all():
+            position = np.unravel_index(
+                np.argmin(self.present[block]), self.present[block].shape
+            )
+            raise KeyError(
+                self._join(tuple(axis[i] for axis, i in zip(axes, position)))
+            )
+        return self.values[block]
+
+    def nbytes(self):
+        return self.values.nbytes + self.present.nbytes
+
+
+def new_statistic(schema: str):
+    """Return an empty statistic of a key schema (see statistics_cache.KEY_SCHEMAS)."""
+    if schema[0] == "w":
+        return StatisticArray(len(schema))
+    return dict()
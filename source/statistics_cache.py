@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+# Key layout of every statistic: w = window size, e = event, c = combination of events.
+KEY_SCHEMAS = {
+    "necessity": "wee",
+    "sufficiency": "wee",
+    "D": "we",
+    "N": "e",
+    "p": "e",
+    "accumulated_cause_durations": "wee",
+    "accumulated_effect_durations": "wee",
+    "effect_durations_when_cause_comp": "wee",
+    "accumulated_cause_durations_single_z": "weee",
+    "accumulated_cause_durations_enumerated_z": "weec",
+    "effect_durations_when_cause_comp_single_z": "weee",
+    "effect_durations_when_cause_comp_enumerated_z": "weec",
+}
+
+
+def is_windowed(name):
+    return KEY_SCHEMAS[name][0] == "w"
+
+
+class StatisticsCache:
+    """
+    On-disk cache of the statistics of a dataset.
+
+    An entry is one compressed .npz file named after a fingerprint of the input file
+    contents, the column names, the data size, time slice or horizon and the backend.
+    Every statistic is stored as columnar arrays: an integer key matrix (window sizes as
+    is, events as ids into a vocabulary table, z combinations as ids into a CSR
+    combination table) and a value column. Window sizes are recorded per statistic instead of being
+    part of the fingerprint, so a run asking for new window sizes or new events reuses
+    what is cached and only computes the rest.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        data_path: str,
+        cause_col_name: str,
+        effect_col_name: str,
+        duration_col_name: str,
+        data_size: int,
+        backend: str,
+        time_slice: tuple = (None, None),
+        horizon: int = None,
+    ):
+        self.cache_dir = cache_dir
+        parameters = [
+            cause_col_name,
+            effect_col_name,
+            duration_col_name,
+            data_size,
+            backend,
+        ]
+        if time_slice != (None, None):
+            # Only sliced runs add it, so existing entries keep their fingerprint.
+            parameters.append(list(time_slice))
+        if horizon is not None:
+            parameters.append({"horizon": horizon})
+        self.fingerprint = self._fingerprint(data_path, parameters)
+        self.path = os.path.join(cache_dir, f"{self.fingerprint}.npz")
+
+    @staticmethod
+    def _fingerprint(data_path, parameters):
+        digest = hashlib.sha256()
+        if os.path.isdir(data_path):
+            # A converted dataset: its files, in name order.
+            paths = [
+                os.path.join(data_path, name) for name in sorted(os.listdir(data_path))
+            ]
+        else:
+            paths = [data_path]
+        for path in paths:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        digest.update(json.dumps(parameters).encode())
+        return digest.hexdigest()
+
+    def load(self):
+        """
+        Return ({statistic: {key: value}}, {statistic: cached window sizes}),
+        both empty if there is no entry for the dataset yet.
+        """
+        statistics, windows = dict(), dict()
+        if not os.path.isfile(self.path):
+            return statistics, windows
+
+        with np.load(self.path) as entry:
+            vocabulary = entry["vocabulary"].tolist()
+            indptr = entry["combinations_indptr"]
+            ids = entry["combinations_ids"]
+            combinations = [
+                tuple(vocabulary[i] for i in ids[indptr[c] : indptr[c + 1]])
+                for c in range(len(indptr) - 1)
+            ]
+            decoders = {
+                "w": int,
+                "e": lambda i: vocabulary[i],
+                "c": lambda i: combinations[i],
+            }
+
+            for name in json.loads(str(entry["statistics"])):
+                schema = KEY_SCHEMAS[name]
+                keys = entry[f"{name}.keys"].tolist()
+                values = entry[f"{name}.values"]
+                statistics[name] = {
+                    self._decode(key, schema, decoders): value
+                    for key, value in zip(keys, values)
+                }
+                windows[name] = set(entry[f"{name}.windows"].tolist())
+        return statistics, windows
+
+    @staticmethod
+    def _decode(key, schema, decoders):
+        if len(schema) == 1:
+            return decoders[schema](key[0])
+        return tuple(decoders[kind](part) for kind, part in zip(schema, key))
+
+    def save(self, statistics: dict, windows: dict):
+        """Write the statistics ({statistic: {key: value}}) and their window sizes."""
+        vocabulary, combinations = dict(), dict()
+
+        def encode(key, schema):
+            parts = (key,) if len(schema) == 1 else key
+            encoded = []
+            for kind, part in zip(schema, parts):
+                if kind == "w":
+                    encoded.append(part)
+                elif kind == "e":
+                    encoded.append(vocabulary.setdefault(part, len(vocabulary)))
+                else:
+                    for event in part:
+                        vocabulary.setdefault(event, len(vocabulary))
+                    encoded.append(combinations.setdefault(part, len(combinations)))
+            return encoded
+
+        arrays = dict()
+        for name, statistic in statistics.items():
+            schema = KEY_SCHEMAS[name]
+            keys = [encode(key, schema) for key in statistic]
+            arrays[f"{name}.keys"] = np.array(keys, dtype=np.int64).reshape(
+                len(keys), len(schema)
+            )
+            arrays[f"{name}.values"] = np.array(list(statistic.values()))
+            arrays[f"{name}.windows"] = np.array(
+                sorted(windows.get(name, ())), dtype=np.int64
+            )
+
+        arrays["statistics"] = np.array(json.dumps(list(statistics)))
+        arrays["vocabulary"] = np.array(list(vocabulary), dtype=str)
+        lengths = [len(combination) for combination in combinations]
+        arrays["combinations_indptr"] = np.concatenate(
+            ([0], np.cumsum(lengths))
+        ).astype(np.int64)
+        arrays["combinations_ids"] = np.array(
+            [
+                vocabulary[event]
+                for combination in combinations
+                for event in combination
+            ],
+            dtype=np.int64,
+        )
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=self.cache_dir, suffix=".npz", delete=False
+        ) as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(f.name, self.path)
@@ -0,0 +1,224 @@
+import json
+import numpy as np
+import pandas as pd
+
+
+def sampler(spec: str, minimum: int = 0):
+    """
+    Parse a distribution of integers of at least minimum: "fixed:V", "uniform:A:B" (A to
+    B inclusive) or "geometric:MEAN" (from 1, with mean MEAN). Return a function drawing
+    an array of them from a numpy Generator: sample(rng, size).
+    """
+    kind, *params = spec.split(":")
+    try:
+        params = [float(param) for param in params]
+    except ValueError:
+        params = None
+    if kind == "fixed" and params and len(params) == 1 and params[0] >= minimum:
+        (value,) = params
+        return lambda rng, size: np.full(size, int(value), dtype=np.int64)
+    if (
+        kind == "uniform"
+        and params
+        and len(params) == 2
+        and minimum <= params[0] <= params[1]
+    ):
+        low, high = params
+        return lambda rng, size: rng.integers(int(low), int(high) + 1, size)
+    if kind == "geometric" and params and len(params) == 1 and params[0] >= 1:
+        (mean,) = params
+        return lambda rng, size: rng.geometric(1 / mean, size)
+    raise ValueError(
+        f"Invalid distribution {spec!r}, expected fixed:V, uniform:A:B or geometric:MEAN "
+        f"of integers from {minimum}."
+    )
+
+
+def event_names(prefix: str, n: int) -> np.ndarray:
+    return np.array([f"{prefix}_{i}" for i in range(n)], dtype=object)
+
+
+def plant_causes(
+    n_causes: int, n_effects: int, causes_per_effect: int, rng
+) -> pd.DataFrame:
+    """Draw the distinct true causes of every effect; return the (cause, effect) codes."""
+    if causes_per_effect > n_causes:
+        raise ValueError(
+            f"causes_per_effect {causes_per_effect} exceeds the {n_causes} causes."
+        )
+    causes = np.argsort(rng.random((n_effects, n_causes)), axis=1)[
+        :, :causes_per_effect
+    ]
+    return pd.DataFrame(
+        {
+            "cause": np.sort(causes, axis=1).ravel(),
+            "effect": np.repeat(np.arange(n_effects), causes_per_effect),
+        }
+    )
+
+
+def _join(names, codes, counts):
+    """Join the first counts[i] codes of every row i of codes into an event set."""
+    cells = np.full(len(codes), "", dtype=object)
+    for j in range(codes.shape[1]):
+        present = counts > j
+        events = names[codes[present, j]]
+        cells[present] = events if j == 0 else cells[present] + ", " + events
+    return cells
+
+
+def _distinct_causes(rng, n_rows, n_causes, events_per_row):
+    """
+    Draw events_per_row distinct causes for every row, uniformly among the subsets of
+    that size, sorted: Floyd's sampler, one column of every row at a time.
+    """
+    causes = np.empty((n_rows, events_per_row), dtype=np.int64)
+    for i, j in enumerate(range(n_causes - events_per_row, n_causes)):
+        draws = rng.integers(0, j + 1, n_rows)
+        taken = (causes[:, :i] == draws[:, None]).any(axis=1)
+        causes[:, i] = np.where(taken, j, draws)
+    return np.sort(causes, axis=1)
+
+
+def generate_chunks(
+    n_rows: int,
+    ground_truth: pd.DataFrame,
+    n_causes: int,
+    n_effects: int,
+    events_per_row: int = 1,
+    lag: str = "uniform:0:5",
+    duration: str = "geometric:5",
+    strength: float = 0.8,
+    noise: float = 0.1,
+    chunk_size: int = 1000000,
+    seed: int = 0,
+    cause_col_name: str = "cause",
+    effect_col_name: str = "effect",
+    duration_col_name: str = "duration",
+):
+    """
+    Generate a duration dataset of n_rows rows with the planted causes of ground_truth
+    (cause and effect codes, see plant_causes) and yield it in chunks of chunk_size rows.
+
+    Every row holds events_per_row distinct causes drawn uniformly. Each occurrence of a
+    true cause of an effect triggers the effect with probability strength, lag rows
+    later (lag rows of the next chunks are carried over); a row also gets a random
+    effect with probability noise. The effects of a row are the ones triggered in it,
+    possibly none, and its duration is drawn from duration. The rows are generated a
+    chunk at a time with whole-array operations, reproducibly for a given seed and
+    chunk_size, and can be written out (write_dataset) or passed straight to a data
+    object in place of the path of a duration dataset.
+    """
+    if not 1 <= events_per_row <= n_causes:
+        raise ValueError(f"events_per_row must be between 1 and {n_causes}.")
+    rng = np.random.default_rng(seed)
+    sample_lag, sample_duration = sampler(lag), sampler(duration, 1)
+    cause_names, effect_names = event_names("c", n_causes), event_names("e", n_effects)
+
+    # The effects of every cause, as slices of children.
+    order = np.argsort(ground_truth["cause"].to_numpy(), kind="stable")
+    children = ground_truth["effect"].to_numpy()[order]
+    bounds = np.searchsorted(
+        ground_truth["cause"].to_numpy()[order], np.arange(n_causes + 1)
+    )
+
+    pending_rows = np.empty(0, dtype=np.int64)
+    pending_effects = np.empty(0, dtype=np.int64)
+    time = 0
+    for offset in range(0, n_rows, chunk_size):
+        n = min(chunk_size, n_rows - offset)
+        causes = _distinct_causes(rng, n, n_causes, events_per_row)
+
+        # Every occurrence of a cause, expanded into the effects it may trigger.
+        occurrences = causes.ravel()
+        counts = bounds[occurrences + 1] - bounds[occurrences]
+        firsts = np.cumsum(counts) - counts
+        positions = np.repeat(bounds[occurrences] - firsts, counts) + np.arange(
+            counts.sum()
+        )
+        rows = np.repeat(
+            np.repeat(np.arange(offset, offset + n), events_per_row), counts
+        )
+        triggered = rng.random(len(rows)) < strength
+        rows = rows[triggered] + sample_lag(rng, triggered.sum())
+        effects = children[positions[triggered]]
+
+        noisy = np.flatnonzero(rng.random(n) < noise)
+        rows = np.concatenate([pending_rows, rows, noisy + offset])
+        effects = np.concatenate(
+            [pending_effects, effects, rng.integers(0, n_effects, len(noisy))]
+        )
+        later = rows >= offset + n
+        pending_rows, pending_effects = rows[later], effects[later]
+        pending_effects = pending_effects[pending_rows < n_rows]
+        pending_rows = pending_rows[pending_rows < n_rows]
+
+        # The distinct effects of every row, in order, as a padded (row, effect) array.
+        keys = np.sort((rows[~later] - offset) * n_effects + effects[~later])
+        keys = keys[np.append(True, keys[1:] != keys[:-1])]
+        rows, effects = keys // n_effects, keys % n_effects
+        effect_counts = np.bincount(rows, minlength=n)
+        codes = np.zeros((n, max(1, effect_counts.max(initial=0))), dtype=np.int64)
+        codes[
+            rows,
+            np.arange(len(rows))
+            - np.repeat(np.cumsum(effect_counts) - effect_counts, effect_counts),
+        ] = effects
+
+        durations = sample_duration(rng, n)
+        ends = time + np.cumsum(durations) - 1
+        time = ends[-1] + 1
+        yield pd.DataFrame(
+            {
+                cause_col_name: _join(cause_names, causes, np.full(n, events_per_row)),
+                effect_col_name: _join(effect_names, codes, effect_counts),
+                "start": ends - durations + 1,
+                "end": ends,
+                duration_col_name: durations,
+            }
+        )
+
+
+def write_dataset(
+    out_path: str,
+    ground_truth_path: str,
+    parent_path: str,
+    n_rows: int,
+    n_causes: int,
+    n_effects: int,
+    causes_per_effect: int = 1,
+    seed: int = 0,
+    **kwargs,
+):
+    """
+    Plant causes_per_effect true causes for every effect and write a duration dataset
+    of n_rows rows (generate_chunks, with kwargs) as a CSV, chunk by chunk, along with
+    its ground truth (cause, effect) and its parent file, which lists every effect and
+    its true causes. Return the ground truth.
+    """
+    rng = np.random.default_rng(seed)
+    codes = plant_causes(n_causes, n_effects, causes_per_effect, rng)
+    header = True
+    for rows in generate_chunks(
+        n_rows, codes, n_causes, n_effects, seed=seed + 1, **kwargs
+    ):
+        rows.to_csv(out_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+    ground_truth = pd.DataFrame(
+        {
+            "cause": event_names("c", n_causes)[codes["cause"]],
+            "effect": event_names("e", n_effects)[codes["effect"]],
+        }
+    )
+    ground_truth.to_csv(ground_truth_path, index=False)
+    with open(parent_path, "w") as f:
+        json.dump(
+            {
+                effect: [effect] + list(group["cause"])
+                for effect, group in ground_truth.groupby("effect", sort=False)
+            },
+            f,
+            indent=4,
+        )
+    return ground_truth
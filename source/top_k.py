@@ -0,0 +1,466 @@
+import numpy as np
+import pandas as pd
+
+import nst
+import cirb
+import circ
+from dec_data_object import DECDataObject, SCORE_STATISTICS
+from event_index import CAUSE, EFFECT
+from statistics_cache import KEY_SCHEMAS
+
+# The scores top_k() can rank; the cirm scores aggregate over z combinations and
+# have no cheap per-pair bound.
+TOP_K_SCORES = ("nst", "cirb", "circ")
+
+# The statistics bounded by ScoreBounds per block of rows, for every score.
+BLOCK_BOUNDS = {
+    "nst": ("necessity", "sufficiency", "cause", "effect"),
+    "cirb": ("cause",),
+    "circ": ("cause", "effect", "covered"),
+}
+
+
+class TopKDataObject(DECDataObject):
+    """
+    A DECDataObject that only computes the per-event statistics (N, p, total durations)
+    at construction. The (window size, cause, effect) statistics are computed by top_k()
+    for the pairs it cannot prune, instead of for every pair.
+    """
+
+    def _required_statistics(self):
+        return tuple(
+            name
+            for name in super()._required_statistics()
+            if KEY_SCHEMAS[name] != "wee"
+        )
+
+    def append(self, rows: pd.DataFrame):
+        super().append(rows)
+        self._forget_pairs()
+
+    def evict(self, n_rows: int):
+        super().evict(n_rows)
+        self._forget_pairs()
+
+    def _forget_pairs(self):
+        """Drop the pair statistics computed so far, which append() and evict() do not update."""
+        for name in pair_statistics(self.scores):
+            setattr(self, name, self._new_statistic(name))
+
+
+def pair_statistics(scores):
+    """Return the (window size, cause, effect) statistics read by the scores."""
+    return tuple(
+        dict.fromkeys(
+            name
+            for score in scores
+            for name in SCORE_STATISTICS[score]
+            if KEY_SCHEMAS[name] == "wee"
+        )
+    )
+
+
+def top_k(
+    data_obj: DECDataObject,
+    score: str,
+    k: int,
+    window_sizes: list = None,
+    causes: list = None,
+    effects: list = None,
+    lambda_const: float = 0.5,
+    alpha_const: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Rank the causes of every effect by a score, for every window size, and return the
+    k best as rows (window size, effect, rank, cause, score). Ties are broken by the
+    order of the causes in data_obj.pair_axes(causes, effects).
+
+    The score of every (window size, cause, effect) is first bounded from above without
+    the pair statistics (see ScoreBounds). The causes of an effect are then evaluated k
+    per window size at a time, best bound first, and a cause is never evaluated once
+    its bound is below the k-th best score evaluated for every window size. The pair statistics are computed for the evaluated pairs only, so with a
+    TopKDataObject most of the pairwise counting is skipped; the scores are those of
+    the matrix score modules. The number of pairs evaluated is returned in
+    attrs["evaluated pairs"].
+    """
+    if score not in TOP_K_SCORES:
+        raise ValueError(
+            f"Unknown score {score!r} for top-k, expected one of {list(TOP_K_SCORES)}."
+        )
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}.")
+    if score == "nst" and not 0 <= lambda_const <= 1:
+        raise ValueError(
+            f"lambda_const must be between 0 and 1 for top-k, got {lambda_const}: "
+            "NST then decreases with one of its statistics and cannot be bounded."
+        )
+    if window_sizes is None:
+        window_sizes = data_obj.window_sizes
+    causes, effects = data_obj.pair_axes(causes, effects)
+    windows = np.array(window_sizes, dtype=np.int64)
+    score_bounds = ScoreBounds(data_obj, windows, causes)
+
+    bounds, exact, evaluated = dict(), dict(), dict()
+    for effect in effects:
+        bounds[effect] = score_bounds.scores(score, effect, lambda_const, alpha_const)
+        exact[effect] = np.zeros(bounds[effect].shape)
+        evaluated[effect] = np.zeros(len(causes), dtype=bool)
+
+    pending = list(effects)
+    try:
+        while pending:
+            batches = dict()
+            for effect in pending:
+                batch = _next_causes(
+                    bounds[effect], exact[effect], evaluated[effect], k
+                )
+                if len(batch) > 0:
+                    batches[effect] = batch
+            data_obj.compute_pairs(
+                pair_statistics([score]),
+                [
+                    (causes[c], effect)
+                    for effect, batch in batches.items()
+                    for c in batch
+                ],
+            )
+            for effect, batch in batches.items():
+                exact[effect][:, batch] = _score_matrix(
+                    data_obj,
+                    score,
+                    window_sizes,
+                    [causes[c] for c in batch],
+                    effect,
+                    lambda_const,
+                    alpha_const,
+                )
+                evaluated[effect][batch] = True
+            pending = list(batches)
+    finally:
+        data_obj.executor.close()
+
+    results = []
+    positions = np.arange(len(causes))
+    for effect in effects:
+        candidates = np.flatnonzero(evaluated[effect])
+        for w, window_size in enumerate(window_sizes):
+            scores = exact[effect][w, candidates]
+            order = candidates[np.lexsort((positions[candidates], -scores))][:k]
+            results.extend(
+                (window_size, effect, rank + 1, causes[c], exact[effect][w, c])
+                for rank, c in enumerate(order)
+            )
+    results = pd.DataFrame(
+        results, columns=["window size", "effect", "rank", "cause", score]
+    )
+    results.attrs["evaluated pairs"] = int(sum(map(np.sum, evaluated.values())))
+    return results
+
+
+def _score_matrix(
+    data_obj, score, window_sizes, causes, effect, lambda_const, alpha_const
+):
+    """Return the exact scores of the causes for an effect, as a (window size, cause) array."""
+    if score == "nst":
+        scores = nst.nst_matrix(
+            data_obj, window_sizes, lambda_const, alpha_const, causes, [effect]
+        )
+    elif score == "cirb":
+        scores = cirb.cirb_matrix(data_obj, window_sizes, causes, [effect])
+    else:
+        scores = circ.circ_matrix(data_obj, window_sizes, causes, [effect])
+    return scores[:, :, 0]
+
+
+def _next_causes(bounds, exact, evaluated, k):
+    """
+    Return the positions of the next causes to evaluate for an effect: for every window
+    size, the k causes with the best bounds among those that can still enter the top k.
+    A cause cannot if its bound is below the k-th best score evaluated, or equal to it
+    and the cause comes after the k-th best in the tie-breaking order.
+    """
+    positions = np.arange(bounds.shape[1])
+    candidates = np.flatnonzero(evaluated)
+    unevaluated = ~evaluated
+    batch = set()
+    for w in range(bounds.shape[0]):
+        needed = unevaluated
+        if len(candidates) >= k:
+            scores = exact[w, candidates]
+            kth = candidates[np.lexsort((candidates, -scores))[k - 1]]
+            threshold = exact[w, kth]
+            needed = unevaluated & (
+                (bounds[w] > threshold) | ((bounds[w] == threshold) & (positions < kth))
+            )
+        needed = np.flatnonzero(needed)
+        batch.update(needed[np.lexsort((needed, -bounds[w, needed]))][:k].tolist())
+    return sorted(batch)
+
+
+class ScoreBounds:
+    """
+    Upper bounds on the scores of every cause for an effect, computed without the
+    pair statistics, as a (window size, cause) array.
+
+    Per event x, with n(x) the rows of x, Dw(x) the windows in which x occurs and Mw(x)
+    the largest duration sum of x within a window:
+
+        Nw(x <- y) <= min(n(y), Dw(x))
+        Nw(x -> y) <= min(n(x), Dw(y))
+        sum_duration_in_window(x) <= min(min(w, n(y)) * total_duration(x), min(n(y), Dw(x)) * Mw(x))
+        sum_duration_in_window(y) <= min(min(w, n(x)) * total_duration(y), min(n(x), Dw(y)) * Mw(y))
+
+    and, as x occurs in at most Dw(x) of the windows ending at a row of y, the durations
+    of y when x didn't occur in the previous window are at least the durations of y in
+    the windows that fit, less its min(n(y), Dw(x)) largest durations.
+
+    Per pair, the rows are cut into blocks of w rows, so that a window spans at most two
+    consecutive blocks: only the rows of y in the blocks where x occurs or that follow
+    one count towards Nw(x <- y), and only the rows of x in the blocks where y occurs or
+    that precede one towards Nw(x -> y); the durations summed are bounded by those in
+    the two blocks. These cost a pass over the blocks in which the causes occur per
+    effect and window size, instead of over the occurrence rows of every pair.
+
+    The bounds are combined with the operations of the score, which are monotonic in
+    each statistic. For NST this requires 0 <= lambda_const <= 1, so that both of its
+    exponents are non-negative; any alpha_const is valid.
+    """
+
+    # Relative slack absorbing the rounding of duration sums summed in another order
+    # than the statistics.
+    SLACK = 1e-9
+
+    def __init__(self, data_obj, windows: np.ndarray, causes: list):
+        self.data_obj = data_obj
+        self.windows = windows
+        self.causes = causes
+        self.cause_windows = self._event_windows(causes, CAUSE)
+        self.total_duration_x = data_obj.event_array(
+            data_obj.cause_total_duration, causes
+        )
+
+        self.cause_blocks = [
+            self._cause_blocks(window_size, self.cause_windows["M"][w])
+            for w, window_size in enumerate(windows)
+        ]
+
+    def _event_windows(self, events, column):
+        """
+        Per-event window quantities of a column, each a (window size, event) array or an
+        event array:
+            count: the rows where the event occurs.
+            D: the windows of the dataset in which the event occurs.
+            M: the largest sum of the durations of the event within a window.
+            total: the sum of the durations of the event (its total duration).
+        """
+        T, windows = self.data_obj.T, self.windows
+        count = np.zeros(len(events), dtype=np.int64)
+        D = np.zeros((len(windows), len(events)), dtype=np.int64)
+        M = np.zeros((len(windows), len(events)), dtype=np.float64)
+        total = np.zeros(len(events), dtype=np.float64)
+        all_windows = np.maximum(T - windows + 1, 0)
+        rows_of = []
+        for i, event in enumerate(events):
+            rows = self.data_obj.event_index.rows(event, column)
+            rows_of.append(rows)
+            count[i] = len(rows)
+            if len(rows) == 0:
+                continue
+            runs = np.diff(np.concatenate(([-1], rows, [T]))) - 1
+            D[:, i] = all_windows - np.maximum(runs - windows[:, None] + 1, 0).sum(
+                axis=1
+            )
+            # The heaviest window can be taken to start at an occurrence row.
+            prefix = np.concatenate(([0], np.cumsum(self.data_obj.durations[rows])))
+            for w, window_size in enumerate(windows):
+                stops = rows.searchsorted(rows + window_size)
+                M[w, i] = (prefix[stops] - prefix[:-1]).max()
+            total[i] = prefix[-1]
+        return {"count": count, "D": D, "M": M, "total": total, "rows": rows_of}
+
+    def _cause_blocks(self, window_size, M):
+        """
+        The blocks of window_size rows in which every cause occurs (with its rows and
+        durations there), and the blocks it covers, i.e. those and the blocks following
+        them (with the durations of the cause in the block and the one before, at most
+        M, the largest duration sum of the cause within a window).
+        """
+        n_blocks = self.data_obj.T // window_size + 2
+        rows = self.cause_windows["rows"]
+        causes = np.repeat(np.arange(len(rows)), self.cause_windows["count"])
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        durations = self.data_obj.durations[rows]
+
+        keys, inverse = np.unique(
+            causes * n_blocks + rows // window_size, return_inverse=True
+        )
+        occurring = {
+            "cause": keys // n_blocks,
+            "block": keys % n_blocks,
+            "count": np.bincount(inverse, minlength=len(keys)),
+            "duration": np.bincount(inverse, weights=durations, minlength=len(keys)),
+        }
+        covered_keys, inverse = np.unique(
+            np.concatenate((keys, keys + 1)), return_inverse=True
+        )
+        covered_causes = covered_keys // n_blocks
+        covered_durations = np.bincount(
+            inverse,
+            weights=np.tile(occurring["duration"], 2),
+            minlength=len(covered_keys),
+        )
+        covered = {
+            "cause": covered_causes,
+            "block": covered_keys % n_blocks,
+            "duration": np.minimum(covered_durations, M[covered_causes]),
+        }
+        return n_blocks, occurring, covered
+
+    def _block_bounds(self, effect_window, names):
+        """
+        Bound the statistics names of every cause for an effect by its blocks, per
+        window size.
+        """
+        rows = effect_window["rows"]
+        durations = self.data_obj.durations[rows]
+        n_causes = len(self.causes)
+        bounds = {name: np.zeros((len(self.windows), n_causes)) for name in names}
+        for w, window_size in enumerate(self.windows):
+            n_blocks, occurring, covered = self.cause_blocks[w]
+            blocks = rows // window_size
+            n_y = np.bincount(blocks, minlength=n_blocks)
+            s_y = np.bincount(blocks, weights=durations, minlength=n_blocks)
+            block = occurring["block"]
+            n_y_next = n_y[block] + n_y[block + 1]
+
+            def per_cause(entries, weights):
+                return np.bincount(
+                    entries["cause"], weights=weights, minlength=n_causes
+                )
+
+            if "necessity" in names:
+                # A row of y in a covered block.
+                bounds["necessity"][w] = per_cause(covered, n_y[covered["block"]])
+            if "cause" in names:
+                # A row of y in a covered block, with at most the durations of x there;
+                # or a row of x, in the windows of at most min(w, n(y)) rows of y in its
+                # block and the next.
+                bounds["cause"][w] = np.minimum(
+                    per_cause(covered, n_y[covered["block"]] * covered["duration"]),
+                    per_cause(
+                        occurring,
+                        occurring["duration"] * np.minimum(n_y_next, window_size),
+                    ),
+                )
+            if "sufficiency" in names:
+                bounds["sufficiency"][w] = per_cause(
+                    occurring, occurring["count"] * (n_y_next > 0)
+                )
+            if "effect" in names:
+                bounds["effect"][w] = per_cause(
+                    occurring,
+                    occurring["count"]
+                    * np.minimum(s_y[block] + s_y[block + 1], effect_window["M"][w]),
+                )
+            if "covered" in names:
+                # The rows of y following a row of x by less than w lie in these
+                # blocks, and their durations sum to at most sum_duration_in_window(y).
+                bounds["covered"][w] = np.minimum(
+                    per_cause(covered, s_y[covered["block"]]), bounds["effect"][w]
+                )
+        return bounds
+
+    def scores(self, score, effect, lambda_const=0.5, alpha_const=0.5):
+        """Bound the score of every cause for an effect, as a (window size, cause) array."""
+        data_obj, T, w = self.data_obj, self.data_obj.T, self.windows[:, None]
+        effect_window = {
+            name: values[0] if name == "rows" else values[..., 0]
+            for name, values in self._event_windows([effect], EFFECT).items()
+        }
+        blocks = self._block_bounds(effect_window, BLOCK_BOUNDS[score])
+        cause_window = self.cause_windows
+        n_x, D_x, M_x = cause_window["count"], cause_window["D"], cause_window["M"]
+        n_y = effect_window["count"]
+        D_y, M_y = effect_window["D"][:, None], effect_window["M"][:, None]
+        total_duration_x = self.total_duration_x
+        total_duration_y = data_obj.effect_total_duration[effect]
+
+        sum_duration_in_window_x = np.minimum(
+            np.minimum(
+                np.minimum(w, n_y) * cause_window["total"], np.minimum(n_y, D_x) * M_x
+            ),
+            blocks["cause"],
+        ) * (1 + self.SLACK)
+        if score == "nst":
+            necessity = np.minimum(np.minimum(n_y, D_x), blocks["necessity"])
+            sufficiency = np.minimum(np.minimum(n_x, D_y), blocks["sufficiency"])
+            sum_duration_in_window_y = np.minimum(
+                np.minimum(
+                    np.minimum(w, n_x) * effect_window["total"],
+                    np.minimum(n_x, D_y) * M_y,
+                ),
+                blocks["effect"],
+            ) * (1 + self.SLACK)
+            return self._nst(
+                effect,
+                necessity / T,
+                sufficiency / T,
+                sum_duration_in_window_x,
+                sum_duration_in_window_y,
+                total_duration_y,
+                lambda_const,
+                alpha_const,
+            )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nominator = np.where(
+                total_duration_x != 0, sum_duration_in_window_x / total_duration_x, 0.0
+            )
+        if score == "cirb":
+            denominator = data_obj.N[effect] / T
+            if denominator == 0:
+                return np.zeros(nominator.shape)
+            return nominator / denominator
+
+        if total_duration_y == 0:
+            return np.zeros(nominator.shape)
+        rows = effect_window["rows"]
+        durations = data_obj.durations[rows]
+        prefix = np.concatenate(([0], np.cumsum(durations)))
+        in_windows = (prefix[-1] - prefix[rows.searchsorted(self.windows - 1)])[:, None]
+        largest = np.concatenate(([0], np.cumsum(np.sort(durations)[::-1])))
+        sum_duration_comp = np.maximum(
+            in_windows - np.minimum(largest[np.minimum(n_y, D_x)], blocks["covered"]),
+            0,
+        ) * (1 - self.SLACK)
+        denominator = sum_duration_comp / total_duration_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                denominator != 0,
+                nominator / denominator,
+                np.where(nominator != 0, np.inf, 0.0),
+            )
+
+    def _nst(
+        self,
+        effect,
+        pw_backward,
+        pw_forward,
+        sum_duration_in_window_x,
+        sum_duration_in_window_y,
+        total_duration_y,
+        lambda_const,
+        alpha_const,
+    ):
+        """NST of the bounds of its statistics, as nst.nst_matrix() computes it."""
+        statistics = (
+            pw_backward,
+            pw_forward,
+            self.data_obj.event_array(self.data_obj.p, self.causes),
+            self.data_obj.p[effect],
+            sum_duration_in_window_x,
+            sum_duration_in_window_y,
+            self.total_duration_x,
+            total_duration_y,
+        )
+        return nst.nst_grid(statistics, [lambda_const], [alpha_const])[0, 0]
@@ -0,0 +1,429 @@
+import numpy as np
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from event_index import CAUSE, EFFECT
+
+
+def is_integral(durations: np.ndarray) -> bool:
+    """Whether every duration is a whole number."""
+    return np.issubdtype(durations.dtype, np.integer) or bool(
+        np.all(np.mod(durations, 1) == 0)
+    )
+
+
+class PythonWindowEngine:
+    """
+    Derive the windowed counts and accumulated durations of a (cause, effect) pair
+    for every window size in a single pass over the occurrence rows of the pair.
+
+    An effect row k is counted by the windows w with dist(k) < w <= k + 1, where dist(k)
+    is the distance to the last cause row at or before k; a cause row i is counted by the
+    windows w with next(i) < w <= T - i, where next(i) is the distance to the next effect
+    row at or after i. Duration sums over a window are read from per-event prefix sums
+    when the durations are integral (the sums are then exact); otherwise each window is
+    summed directly so the results stay bit-identical to the row-by-row definition.
+    """
+
+    backend = "python"
+
+    def __init__(self, event_index, durations: np.ndarray, window_sizes: list):
+        self.event_index = event_index
+        self.durations = durations
+        self.duration_values = durations.tolist()
+        self.T = len(durations)
+        self.window_sizes = sorted(set(window_sizes))
+        self.integral = is_integral(durations)
+        self._prefix_sums = dict()
+        self._cooccurrences = None
+
+    def cooccurrences(self, chunk_size: int = 1 << 20) -> dict:
+        """
+        Return {cause: effects} of the pairs that co-occur within the largest window size:
+        a cause row i and an effect row k with 0 <= k - i < max(window_sizes). No window
+        of any other pair holds both, so its windowed statistics are those of a cause
+        that never occurs. Found by pairing the events of every row with those of the row
+        d rows later, for every d, rows chunk_size at a time.
+        """
+        if self._cooccurrences is not None:
+            return self._cooccurrences
+        index = self.event_index
+        n_events = max(len(index.events), 1)
+        cause_lengths = np.diff(index.cause_indptr)
+        effect_lengths = np.diff(index.effect_indptr)
+        codes = np.empty(0, dtype=np.int64)
+        for d in range(min(max(self.window_sizes, default=0), self.T)):
+            found = [codes]
+            for start in range(0, self.T - d, chunk_size):
+                stop = min(start + chunk_size, self.T - d)
+                n_effects = effect_lengths[start + d : stop + d]
+                n_pairs = cause_lengths[start:stop] * n_effects
+                rows = np.repeat(np.arange(start, stop), n_pairs)
+                if len(rows) == 0:
+                    continue
+                # The position of every pair in the cross product of its row.
+                positions = np.arange(len(rows)) - np.repeat(
+                    np.cumsum(n_pairs) - n_pairs, n_pairs
+                )
+                widths = n_effects[rows - start]
+                causes = index.cause_ids[index.cause_indptr[rows] + positions // widths]
+                effects = index.effect_ids[
+                    index.effect_indptr[rows + d] + positions % widths
+                ]
+                found.append(np.unique(causes.astype(np.int64) * n_events + effects))
+            codes = np.unique(np.concatenate(found))
+
+        self._cooccurrences = dict()
+        for cause_id, effect_id in zip(*np.divmod(codes, n_events)):
+            self._cooccurrences.setdefault(index.events[cause_id], set()).add(
+                index.events[effect_id]
+            )
+        return self._cooccurrences
+
+    def _rows(self, event, column):
+        return self.event_index.rows(event, column).tolist()
+
+    def _window_range(self, low, high):
+        """Return the index range of the window sizes w with low < w <= high."""
+        return (
+            bisect_right(self.window_sizes, low),
+            bisect_right(self.window_sizes, high),
+        )
+
+    def _collect(self, values, cast=None):
+        if cast is None:
+            return dict(zip(self.window_sizes, values))
+        return {w: cast(value) for w, value in zip(self.window_sizes, values)}
+
+    def _cumulate(self, deltas):
+        counts = []
+        running = 0
+        for delta in deltas[:-1]:
+            running += delta
+            counts.append(running)
+        return self._collect(counts)
+
+    def _window_sum(self, event, column, start, stop):
+        """Sum the durations of the occurrence rows rows[start:stop] of an event."""
+        if start >= stop:
+            return 0
+        if not self.integral:
+            rows = self.event_index.rows(event, column)
+            return float(self.durations[rows[start:stop]].sum())
+
+        prefix = self._prefix_sums.get((event, column))
+        if prefix is None:
+            prefix = [0]
+            for row in self._rows(event, column):
+                prefix.append(prefix[-1] + self.duration_values[row])
+            self._prefix_sums[(event, column)] = prefix
+        return prefix[stop] - prefix[start]
+
+    def necessity(self, cause, effect):
+        """Nw(x <- y): given y occurs, x occurred in the previous window."""
+        cause_rows = self._rows(cause, CAUSE)
+        deltas = [0] * (len(self.window_sizes) + 1)
+        j = 0
+
+        for k in self._rows(effect, EFFECT):
+            while j < len(cause_rows) and cause_rows[j] <= k:
+                j += 1
+            if j == 0:
+                continue
+            lo, hi = self._window_range(k - cause_rows[j - 1], k + 1)
+            if lo < hi:
+                deltas[lo] += 1
+                deltas[hi] -= 1
+        return self._cumulate(deltas)
+
+    def sufficiency(self, cause, effect):
+        """Nw(x -> y): given x occurs, y occurs in the next window."""
+        effect_rows = self._rows(effect, EFFECT)
+        deltas = [0] * (len(self.window_sizes) + 1)
+        j = 0
+
+        for i in self._rows(cause, CAUSE):
+            while j < len(effect_rows) and effect_rows[j] < i:
+                j += 1
+            if j == len(effect_rows):
+                break
+            lo, hi = self._window_range(effect_rows[j] - i, self.T - i)
+            if lo < hi:
+                deltas[lo] += 1
+                deltas[hi] -= 1
+        return self._cumulate(deltas)
+
+    def D(self, cause):
+        """
+        Dw(x): the number of windows in which x occurs, i.e. all T - w + 1 windows minus
+        the windows that fit entirely inside a run of rows without x.
+        """
+        cause_rows = self._rows(cause, CAUSE)
+        bounds = [-1] + cause_rows + [self.T]
+        runs = Counter(
+            bounds[i + 1] - bounds[i] - 1
+            for i in range(len(bounds) - 1)
+            if bounds[i + 1] - bounds[i] > 1
+        )
+
+        counts = []
+        for w in self.window_sizes:
+            empty_windows = sum(
+                (length - w + 1) * n for length, n in runs.items() if length >= w
+            )
+            counts.append(max(0, self.T - w + 1) - empty_windows)
+        return self._collect(counts)
+
+    def accumulated_cause_durations(self, cause, effect):
+        """Given y occurs, accumulate the durations of all x in the previous window."""
+        cause_rows = self._rows(cause, CAUSE)
+        totals = [0] * len(self.window_sizes)
+        stop = 0
+
+        for k in self._rows(effect, EFFECT):
+            while stop < len(cause_rows) and cause_rows[stop] <= k:
+                stop += 1
+            for idx in range(bisect_right(self.window_sizes, k + 1)):
+                start = bisect_left(cause_rows, k - self.window_sizes[idx] + 1, 0, stop)
+                totals[idx] += self._window_sum(cause, CAUSE, start, stop)
+        return self._collect(totals, self.durations.dtype.type)
+
+    def accumulated_effect_durations(self, cause, effect):
+        """Given x occurs, accumulate the durations of all y in the next window."""
+        effect_rows = self._rows(effect, EFFECT)
+        totals = [0] * len(self.window_sizes)
+        start = 0
+
+        for i in self._rows(cause, CAUSE):
+            while start < len(effect_rows) and effect_rows[start] < i:
+                start += 1
+            for idx in range(bisect_right(self.window_sizes, self.T - i)):
+                stop = bisect_left(effect_rows, i + self.window_sizes[idx], start)
+                totals[idx] += self._window_sum(effect, EFFECT, start, stop)
+        return self._collect(totals, self.durations.dtype.type)
+
+    def effect_durations_when_cause_comp(self, cause, effect):
+        """Given y occurs but x didn't occur in the previous window, accumulate the duration of y."""
+        cause_rows = self._rows(cause, CAUSE)
+        totals = [0] * len(self.window_sizes)
+        j = 0
+
+        for k in self._rows(effect, EFFECT):
+            while j < len(cause_rows) and cause_rows[j] <= k:
+                j += 1
+            dist = k - cause_rows[j - 1] if j > 0 else self.T
+            for idx in range(bisect_right(self.window_sizes, min(k + 1, dist))):
+                totals[idx] += self.duration_values[k]
+        return self._collect(totals, self.durations.dtype.type)
+
+    def z_durations(self, effect, causes, combinations, comp=False):
+        """
+        For every cause x, combination Z of z events and window size, given y occurs and
+        every z in Z occurred in the previous window: accumulate the durations of all x in
+        the window, or with comp, accumulate the duration of y if x didn't occur in it.
+        Returns {(cause, combination): {w: value}}.
+        """
+        results = dict()
+        effect_rows = self._rows(effect, EFFECT)
+        for cause in causes:
+            for combination in combinations:
+                z_cols = {z: self.event_index.column_of(z) for z in combination}
+                totals = [0] * len(self.window_sizes)
+                for idx, w in enumerate(self.window_sizes):
+                    for k in effect_rows:
+                        if k < w - 1:
+                            continue
+                        if not all(
+                            self.event_index.any_in(z, z_cols[z], k - w + 1, k + 1)
+                            for z in combination
+                        ):
+                            continue
+                        cause_rows = self.event_index.rows_in(
+                            cause, CAUSE, k - w + 1, k + 1
+                        )
+                        if comp:
+                            if len(cause_rows) == 0:
+                                totals[idx] += self.durations[k]
+                        elif len(cause_rows) > 0:
+                            totals[idx] += self.durations[cause_rows].sum()
+                results[(cause, combination)] = self._collect(totals)
+        return results
+
+
+class NumpyWindowEngine(PythonWindowEngine):
+    """
+    Whole-array variant of the window engine.
+
+    Occurrence is represented by boolean arrays over the T rows. Whether x occurred in
+    the window [k - w + 1, k] is read off its cumulative occurrence counts, for all window
+    sizes at once, at the occurrence rows of the other event; duration sums are read off
+    the prefix sums of the durations masked by the occurrence of the event. Sums are
+    exact for integral durations and agree with the python backend up to floating-point
+    rounding otherwise.
+    """
+
+    backend = "numpy"
+
+    def __init__(self, event_index, durations: np.ndarray, window_sizes: list):
+        super().__init__(event_index, durations, window_sizes)
+        self.windows = np.array(self.window_sizes, dtype=np.int64)[:, None]
+        self._cumulative_sums = dict()
+
+    def _occurrence(self, event, column):
+        occurrence = np.zeros(self.T, dtype=bool)
+        occurrence[self.event_index.rows(event, column)] = True
+        return occurrence
+
+    def _cumulative(self, event, column):
+        """
+        Return the cumulative occurrence counts and the cumulative occurrence-masked
+        durations of an event, both with a leading zero.
+        """
+        key = (event, column)
+        if key not in self._cumulative_sums:
+            occurrence = self._occurrence(event, column)
+            counts = np.zeros(self.T + 1, dtype=np.int64)
+            np.cumsum(occurrence, out=counts[1:])
+            durations = np.zeros(self.T + 1, dtype=self.durations.dtype)
+            np.cumsum(np.where(occurrence, self.durations, 0), out=durations[1:])
+            self._cumulative_sums[key] = counts, durations
+        return self._cumulative_sums[key]
+
+    def _trailing_windows(self, cause, effect):
+        """
+        For every window size (axis 0) and effect row k (axis 1): the window start
+        k - w + 1, whether the window fits in the dataset and whether x occurred in it.
+        """
+        rows = self.event_index.rows(effect, EFFECT)
+        starts = rows - self.windows + 1
+        valid = starts >= 0
+        starts = np.maximum(starts, 0)
+        counts, _ = self._cumulative(cause, CAUSE)
+        present = counts[rows + 1] - counts[starts] > 0
+        return rows, starts, valid, present
+
+    def _leading_windows(self, cause, effect):
+        """
+        For every window size (axis 0) and cause row i (axis 1): the window stop
+        i + w, whether the window fits in the dataset and whether y occurs in it.
+        """
+        rows = self.event_index.rows(cause, CAUSE)
+        stops = rows + self.windows
+        valid = stops <= self.T
+        stops = np.minimum(stops, self.T)
+        counts, _ = self._cumulative(effect, EFFECT)
+        present = counts[stops] - counts[rows] > 0
+        return rows, stops, valid, present
+
+    def necessity(self, cause, effect):
+        """Nw(x <- y): given y occurs, x occurred in the previous window."""
+        _, _, valid, present = self._trailing_windows(cause, effect)
+        return self._collect((valid & present).sum(axis=1).tolist())
+
+    def sufficiency(self, cause, effect):
+        """Nw(x -> y): given x occurs, y occurs in the next window."""
+        _, _, valid, present = self._leading_windows(cause, effect)
+        return self._collect((valid & present).sum(axis=1).tolist())
+
+    def D(self, cause):
+        """Dw(x): all T - w + 1 windows minus the windows inside a run of rows without x."""
+        rows = self.event_index.rows(cause, CAUSE)
+        runs = np.diff(np.concatenate(([-1], rows, [self.T]))) - 1
+        empty_windows = np.maximum(runs - self.windows + 1, 0).sum(axis=1)
+        all_windows = np.maximum(self.T - self.windows[:, 0] + 1, 0)
+        return self._collect((all_windows - empty_windows).tolist())
+
+    def accumulated_cause_durations(self, cause, effect):
+        """Given y occurs, accumulate the durations of all x in the previous window."""
+        rows, starts, valid, _ = self._trailing_windows(cause, effect)
+        _, durations = self._cumulative(cause, CAUSE)
+        sums = np.where(valid, durations[rows + 1] - durations[starts], 0)
+        return self._collect(sums.sum(axis=1), self.durations.dtype.type)
+
+    def accumulated_effect_durations(self, cause, effect):
+        """Given x occurs, accumulate the durations of all y in the next window."""
+        rows, stops, valid, _ = self._leading_windows(cause, effect)
+        _, durations = self._cumulative(effect, EFFECT)
+        sums = np.where(valid, durations[stops] - durations[rows], 0)
+        return self._collect(sums.sum(axis=1), self.durations.dtype.type)
+
+    def effect_durations_when_cause_comp(self, cause, effect):
+        """Given y occurs but x didn't occur in the previous window, accumulate the duration of y."""
+        rows, _, valid, present = self._trailing_windows(cause, effect)
+        sums = np.where(valid & ~present, self.durations[rows], 0)
+        return self._collect(sums.sum(axis=1), self.durations.dtype.type)
+
+    def z_durations(self, effect, causes, combinations, comp=False):
+        """
+        For every cause x, combination Z of z events and window size, given y occurs and
+        every z in Z occurred in the previous window: accumulate the durations of all x in
+        the window, or with comp, accumulate the duration of y if x didn't occur in it.
+        Returns {(cause, combination): {w: value}}.
+
+        The presence mask of every z over the (window size, effect row) grid is computed
+        once; the mask of a combination is the mask of its prefix ANDed with the mask of
+        its last z. Combinations are visited in lexicographic order, a depth-first walk of
+        their prefix tree, so only the masks along the current path are kept. Each
+        combination then costs one AND and one masked sum over the per-cause weights.
+        """
+        rows = self.event_index.rows(effect, EFFECT)
+        starts = rows - self.windows + 1
+        valid = starts >= 0
+        starts = np.maximum(starts, 0)
+
+        def presence(event, column):
+            counts, _ = self._cumulative(event, column)
+            return valid & (counts[rows + 1] - counts[starts] > 0)
+
+        weights = np.zeros((len(causes),) + valid.shape, dtype=self.durations.dtype)
+        for c, cause in enumerate(causes):
+            present = presence(cause, CAUSE)
+            if comp:
+                weights[c] = np.where(valid & ~present, self.durations[rows], 0)
+            else:
+                _, durations = self._cumulative(cause, CAUSE)
+                weights[c] = np.where(
+                    present, durations[rows + 1] - durations[starts], 0
+                )
+
+        positions = dict()
+        for combination in combinations:
+            for z in combination:
+                positions.setdefault(z, len(positions))
+        z_masks = dict()
+        results = dict()
+        path = [((), valid)]
+
+        for combination in sorted(
+            set(combinations), key=lambda c: [positions[z] for z in c]
+        ):
+            while combination[: len(path[-1][0])] != path[-1][0]:
+                path.pop()
+            for depth in range(len(path[-1][0]), len(combination)):
+                z = combination[depth]
+                if z not in z_masks:
+                    z_masks[z] = presence(z, self.event_index.column_of(z))
+                path.append((combination[: depth + 1], path[-1][1] & z_masks[z]))
+
+            sums = np.einsum("cwk,wk->cw", weights, path[-1][1].astype(weights.dtype))
+            for c, cause in enumerate(causes):
+                results[(cause, combination)] = self._collect(
+                    sums[c], self.durations.dtype.type
+                )
+        return results
+
+
+WINDOW_ENGINES = {"python": PythonWindowEngine, "numpy": NumpyWindowEngine}
+BACKENDS = ("auto",) + tuple(WINDOW_ENGINES)
+
+
+def window_engine(backend: str, event_index, durations: np.ndarray, window_sizes: list):
+    """
+    Return the window engine of a backend over the rows of an event index. "auto" picks
+    numpy when the durations are integral, where its sums are exact, and python
+    otherwise, so that the statistics stay bit-identical to the row-by-row definition.
+    """
+    if backend == "auto":
+        backend = "numpy" if is_integral(durations) else "python"
+    return WINDOW_ENGINES[backend](event_index, durations, window_sizes)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "source"))
+
+SYNTHETIC_DATA = os.path.join(
+    REPO_DIR, "data", "synthetic", "preprocessedData", "gen_0_duration.csv"
+)
+SYNTHETIC_PARENT = os.path.join(REPO_DIR, "parent", "synthetic", "gen_0.json")
+
+
+@pytest.fixture(scope="session")
+def synthetic_rows():
+    """The first rows of the bundled synthetic dataset, with integral durations."""
+    return pd.read_csv(SYNTHETIC_DATA).iloc[:400].reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def synthetic_parent():
+    return SYNTHETIC_PARENT
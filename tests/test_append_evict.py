@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dec_data_object import DECDataObject
+from event_index import CAUSE, EFFECT
+
+WINDOW_SIZES = [1, 2, 5]
+SCORES = ["nst", "cirb", "circ", "cirm"]
+
+
+def build(rows, parent, **kwargs):
+    return DECDataObject(
+        [rows],
+        "cause",
+        "effect",
+        "duration",
+        WINDOW_SIZES,
+        SCORES,
+        parent,
+        execution="serial",
+        **kwargs,
+    )
+
+
+def assert_same_statistics(data_obj, expected):
+    """The data object holds exactly the statistics of the one built from its rows."""
+    assert data_obj.T == expected.T
+    assert data_obj.cause_set == expected.cause_set
+    assert data_obj.effect_set == expected.effect_set
+    for name in expected.statistics:
+        assert dict(getattr(data_obj, name).items()) == dict(
+            getattr(expected, name).items()
+        ), name
+    for table in ("cause_total_duration", "effect_total_duration"):
+        assert getattr(data_obj, table) == getattr(expected, table), table
+    assert data_obj.event_index.column_events(
+        CAUSE
+    ) == expected.event_index.column_events(CAUSE)
+    assert data_obj.event_index.column_events(
+        EFFECT
+    ) == expected.event_index.column_events(EFFECT)
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_append_matches_rebuild(synthetic_rows, synthetic_parent, backend):
+    data_obj = build(synthetic_rows.iloc[:250], synthetic_parent, backend=backend)
+    for start, stop in ((250, 251), (251, 300), (300, 400)):
+        data_obj.append(synthetic_rows.iloc[start:stop])
+        expected = build(synthetic_rows.iloc[:stop], synthetic_parent, backend=backend)
+        assert_same_statistics(data_obj, expected)
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_evict_matches_rebuild(synthetic_rows, synthetic_parent, backend):
+    data_obj = build(synthetic_rows, synthetic_parent, backend=backend)
+    evicted = 0
+    for n_rows in (1, 37, 150):
+        data_obj.evict(n_rows)
+        evicted += n_rows
+        expected = build(
+            synthetic_rows.iloc[evicted:].reset_index(drop=True),
+            synthetic_parent,
+            backend=backend,
+        )
+        assert_same_statistics(data_obj, expected)
+
+
+def test_horizon_matches_rebuild(synthetic_rows, synthetic_parent):
+    horizon = 600
+    data_obj = build(synthetic_rows.iloc[:200], synthetic_parent, horizon=horizon)
+    for start, stop in ((200, 260), (260, 261), (261, 400)):
+        data_obj.append(synthetic_rows.iloc[start:stop])
+        expected = build(synthetic_rows.iloc[:stop], synthetic_parent, horizon=horizon)
+        assert_same_statistics(data_obj, expected)
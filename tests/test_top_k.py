@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import cirb
+import circ
+import nst
+import top_k
+from dec_data_object import DECDataObject
+
+WINDOW_SIZES = [1, 3, 10]
+MATRICES = {
+    "nst": lambda data_obj, lambda_const, alpha_const: nst.nst_matrix(
+        data_obj, WINDOW_SIZES, lambda_const, alpha_const
+    ),
+    "cirb": lambda data_obj, lambda_const, alpha_const: cirb.cirb_matrix(
+        data_obj, WINDOW_SIZES
+    ),
+    "circ": lambda data_obj, lambda_const, alpha_const: circ.circ_matrix(
+        data_obj, WINDOW_SIZES
+    ),
+}
+
+
+def expected_top_k(data_obj, scores, k):
+    """Rank the causes of the full score matrix, ties broken by the order of the causes."""
+    causes, effects = data_obj.pair_axes()
+    positions = np.arange(len(causes))
+    results = []
+    for e, effect in enumerate(effects):
+        for w, window_size in enumerate(WINDOW_SIZES):
+            order = np.lexsort((positions, -scores[w, :, e]))[:k]
+            results.extend(
+                (window_size, effect, rank + 1, causes[c], scores[w, c, e])
+                for rank, c in enumerate(order)
+            )
+    return results
+
+
+def build(data_class, rows, score):
+    return data_class(
+        [rows],
+        "cause",
+        "effect",
+        "duration",
+        WINDOW_SIZES,
+        [score],
+        execution="serial",
+    )
+
+
+@pytest.mark.parametrize("score", top_k.TOP_K_SCORES)
+@pytest.mark.parametrize("data_class", [DECDataObject, top_k.TopKDataObject])
+@pytest.mark.parametrize("k", [1, 3])
+@pytest.mark.parametrize("lambda_const, alpha_const", [(0.3, 0.7), (1.0, 2.0)])
+def test_top_k_matches_matrix(
+    synthetic_rows, score, data_class, k, lambda_const, alpha_const
+):
+    reference = build(DECDataObject, synthetic_rows, score)
+    expected = expected_top_k(
+        reference, MATRICES[score](reference, lambda_const, alpha_const), k
+    )
+    results = top_k.top_k(
+        build(data_class, synthetic_rows, score),
+        score,
+        k,
+        WINDOW_SIZES,
+        lambda_const=lambda_const,
+        alpha_const=alpha_const,
+    )
+    assert [tuple(row) for row in results.itertuples(index=False)] == expected
+
+
+@pytest.mark.parametrize("lambda_const", [-0.5, 1.5])
+def test_top_k_rejects_nst_lambda_outside_unit_interval(synthetic_rows, lambda_const):
+    data_obj = build(top_k.TopKDataObject, synthetic_rows, "nst")
+    with pytest.raises(ValueError, match="lambda_const"):
+        top_k.top_k(data_obj, "nst", 3, WINDOW_SIZES, lambda_const=lambda_const)